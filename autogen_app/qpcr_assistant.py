@@ -12,6 +12,7 @@ import logging
 import json
 import readline  # Import readline for proper line editing support
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Optional, Callable
 import autogen
 from autogen import ConversableAgent, AssistantAgent, UserProxyAgent, GroupChat, GroupChatManager
@@ -45,6 +46,14 @@ from text_resources import (
     COMPREHENSIVE_REQUEST_TEMPLATE
 )
 
+# Optional: use orjson for config and log JSON when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson else json.loads
+
 # Configure logging - only show WARNING and above to user
 logging.basicConfig(
     level=logging.WARNING,  # Hide INFO logs from user interface
@@ -105,12 +114,14 @@ class TaskLogger:
         self.log_dir = log_dir
         os.makedirs(log_dir, exist_ok=True)
         self.current_session = None
+        self.tool_calls_path = None
         self.task_log = []
 
     def start_session(self, user_request: str):
         """Start a new logging session."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.current_session = f"task_{timestamp}.json"
+        self.tool_calls_path = os.path.join(self.log_dir, f"task_{timestamp}_tool_calls.jsonl")
         self.task_log = [{
             "session_id": timestamp,
             "start_time": datetime.now().isoformat(),
@@ -120,6 +131,13 @@ class TaskLogger:
             "messages": []
         }]
 
+    @staticmethod
+    def _ndjson_line(record: Dict[str, Any]) -> bytes:
+        """Serialize a record as one newline-terminated JSON line."""
+        if orjson:
+            return orjson.dumps(record) + b"\n"
+        return json.dumps(record).encode() + b"\n"
+
     def log_agent_action(self, agent_name: str, action: str, content: str):
         """Log an agent action with smart truncation."""
         if not self.task_log:
@@ -145,7 +163,7 @@ class TaskLogger:
         # Smart truncation for tool results
         processed_result = self._smart_truncate(result, 1000)
 
-        self.task_log[0]["tool_calls"].append({
+        tool_call = {
             "timestamp": datetime.now().isoformat(),
             "agent": agent_name,
             "tool": tool_name,
@@ -154,7 +172,13 @@ class TaskLogger:
             "result_length": len(result),
             "success": not result.startswith("Error:"),
             "truncated": len(result) > 1000
-        })
+        }
+        self.task_log[0]["tool_calls"].append(tool_call)
+
+        # Also stream each call as one NDJSON line so readers can count or
+        # scan tool calls without parsing the whole task log
+        with open(self.tool_calls_path, 'ab') as f:
+            f.write(self._ndjson_line(tool_call))
 
     def log_message(self, source: str, message_type: str, content: str):
         """Log a message with smart truncation."""
@@ -1599,8 +1623,7 @@ def interactive_mode():
         print_colored(f"Expected at: {config_file}\n", Colors.WHITE)
         return
 
-    with open(config_file, 'r') as f:
-        config_list = json.load(f)
+    config_list = json_loads(Path(config_file).read_bytes())
 
     # Determine which model to use
     # CRITICAL: Default to gpt-4o for function calling support
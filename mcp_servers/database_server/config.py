@@ -19,6 +19,7 @@ class Config:
     # Cache and temporary file settings
     TEMP_DIR: str = os.getenv("TEMP_DIR", "/tmp/mcp_cache")
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # 1 hour default
+    PARSE_CACHE_MIN_BYTES: int = int(os.getenv("PARSE_CACHE_MIN_BYTES", "65536"))  # Persist parses of larger payloads only
     
     # Rate limiting
     MAX_REQUESTS_PER_MINUTE: int = int(os.getenv("MAX_REQUESTS_PER_MINUTE", "60"))
@@ -11,13 +11,21 @@ This server provides unified access to multiple biological databases including:
 """
 
 import asyncio
+import functools
+import hashlib
+import io
 import json
 import logging
 import os
+import re
 import sys
 import tempfile
-from typing import Any, Dict, List, Optional, Union, Sequence
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union, Sequence, Tuple
 import traceback
+from collections import ChainMap
+from operator import itemgetter
 
 import gget
 import pandas as pd
@@ -314,30 +322,10 @@ async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> Sequence[typ
     try:
         logger.info(f"Calling tool: {name} with arguments: {arguments}")
         
-        if name == "get_sequences":
-            result = await get_sequences(**arguments)
-        elif name == "gget_ref":
-            result = await gget_ref(**arguments)
-        elif name == "gget_search":
-            result = await gget_search(**arguments)
-        elif name == "gget_info":
-            result = await gget_info(**arguments)
-        elif name == "gget_seq":
-            result = await gget_seq(**arguments)
-        elif name == "get_neighbors":
-            result = await get_neighbors(**arguments)
-        elif name == "get_taxonomy":
-            result = await get_taxonomy(**arguments)
-        elif name == "search_sra_studies":
-            result = await search_sra_studies(**arguments)
-        elif name == "get_sra_runinfo":
-            result = await get_sra_runinfo(**arguments)
-        elif name == "search_sra_cloud":
-            result = await search_sra_cloud(**arguments)
-        elif name == "extract_sequence_columns":
-            result = await extract_sequence_columns(**arguments)
-        else:
+        handler = _TOOL_REGISTRY.get(name)
+        if handler is None:
             raise ValueError(f"Unknown tool: {name}")
+        result = await handler(**arguments)
         
         return [types.TextContent(type="text", text=str(result))]
             
@@ -713,6 +701,7 @@ async def extract_sequence_columns(
     """Extract specific columns from sequence records."""
     try:
         extracted_records = []
+        default_database = ""
         
         # Try to parse as JSON first
         try:
@@ -723,8 +712,11 @@ async def extract_sequence_columns(
                 records = [data]
             else:
                 records = []
+            # JSON records carry no parse-time provenance; infer it once per call
+            if "Database" in columns:
+                default_database = infer_database(sequence_data)
         except json.JSONDecodeError:
-            # Try to parse as FASTA or GenBank
+            # Try to parse as FASTA or GenBank (records are tagged with their database)
             records = parse_sequence_text(sequence_data)
         
         # Extract requested columns from each record
@@ -732,7 +724,7 @@ async def extract_sequence_columns(
             extracted_record = {}
             
             for column in columns:
-                value = extract_column_value(record, column, sequence_data)
+                value = extract_column_value(record, column, default_database)
                 extracted_record[column] = value
             
             extracted_records.append(extracted_record)
@@ -790,21 +782,55 @@ def parse_sequence_text(text: str) -> List[Dict[str, Any]]:
     
     return records
 
+# Marker keywords in priority order. Phrases that merely extend a shorter
+# keyword ("16s ribosomal", "16s rrna") are implied by it and left out.
+MARKER_KEYWORDS = (
+    ("COI", ("coi", "cytochrome oxidase", "cox1", "cytochrome c oxidase")),
+    ("16S", ("16s",)),
+    ("18S", ("18s",)),
+    ("ITS", ("its",)),
+    ("rbcL", ("rbcl",)),
+    ("matK", ("matk",)),
+)
+
+def detect_marker(text_lower: str) -> str:
+    """Return the first marker whose keywords occur in lowercased text."""
+    for marker, keywords in MARKER_KEYWORDS:
+        for keyword in keywords:
+            if keyword in text_lower:
+                return marker
+    return ""
+
+# Location keywords searched for in FASTA headers, in priority order
+COUNTRY_KEYWORDS = ('usa', 'canada', 'norway', 'japan', 'china', 'australia', 'brazil', 'chile', 'scotland', 'ireland', 'france', 'germany', 'italy', 'spain', 'portugal', 'uk', 'united kingdom', 'united states', 'new zealand', 'south africa', 'mexico', 'argentina', 'peru', 'ecuador', 'colombia', 'venezuela', 'russia', 'finland', 'sweden', 'denmark', 'iceland', 'greenland', 'alaska', 'california', 'florida', 'texas', 'washington', 'oregon', 'british columbia', 'ontario', 'quebec', 'atlantic', 'pacific', 'mediterranean')
+
+# Header patterns, compiled once instead of on every parse_fasta_header call
+SPECIES_PATTERN = re.compile(r'\b([A-Z][a-z]+ [a-z]+)\b')
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+
 def parse_fasta_header(header: str) -> Dict[str, Any]:
     """Parse FASTA header to extract metadata."""
+    # Lowercase once; every keyword scan below reuses it
+    header_lower = header.lower()
     record = {
         "Title": header,
         "Id": "",
         "Accession": "",
         "Organism": "",
         "Length": 0,
-        "Database": "NCBI",  # Default for FASTA from NCBI
+        "Database": "NCBI",  # Default for FASTA from NCBI (including gi| headers)
         "Marker": "",
         "Quality Score": "",
         "Country": "",
         "Create Date": ""
     }
     
+    # Tag provenance from the header prefix
+    if header.startswith("BOLD:"):
+        record["Database"] = "BOLD"
+    elif header.startswith("ENS"):
+        record["Database"] = "Ensembl"
+    
     # Try to extract accession from common formats
     parts = header.split()
     if parts:
@@ -821,8 +847,6 @@ def parse_fasta_header(header: str) -> Dict[str, Any]:
                 break
     
     # Extract organism from title
-    header_lower = header.lower()
-    
     # Look for organism in brackets [Salmo salar]
     if "[" in header and "]" in header:
         start = header.rfind("[") + 1
@@ -832,87 +856,174 @@ def parse_fasta_header(header: str) -> Dict[str, Any]:
     else:
         # Try to extract organism from common patterns
         # Look for species names (Genus species pattern)
-        import re
-        species_pattern = r'\b([A-Z][a-z]+ [a-z]+)\b'
-        species_match = re.search(species_pattern, header)
+        species_match = SPECIES_PATTERN.search(header)
         if species_match:
             record["Organism"] = species_match.group(1)
     
     # Extract marker information from title
-    if any(term in header_lower for term in ['coi', 'cytochrome oxidase', 'cox1', 'cytochrome c oxidase']):
-        record["Marker"] = "COI"
-    elif any(term in header_lower for term in ['16s', '16s ribosomal', '16s rrna']):
-        record["Marker"] = "16S"
-    elif any(term in header_lower for term in ['18s', '18s ribosomal', '18s rrna']):
-        record["Marker"] = "18S"
-    elif 'its' in header_lower:
-        record["Marker"] = "ITS"
-    elif 'rbcl' in header_lower:
-        record["Marker"] = "rbcL"
-    elif 'matk' in header_lower:
-        record["Marker"] = "matK"
+    record["Marker"] = detect_marker(header_lower)
     
-    # Try to extract country/location information
-    countries = ['usa', 'canada', 'norway', 'japan', 'china', 'australia', 'brazil', 'chile', 'scotland', 'ireland', 'france', 'germany', 'italy', 'spain', 'portugal', 'uk', 'united kingdom', 'united states', 'new zealand', 'south africa', 'mexico', 'argentina', 'peru', 'ecuador', 'colombia', 'venezuela', 'russia', 'finland', 'sweden', 'denmark', 'iceland', 'greenland', 'alaska', 'california', 'florida', 'texas', 'washington', 'oregon', 'british columbia', 'ontario', 'quebec', 'atlantic', 'pacific', 'mediterranean']
-    for country in countries:
+    # Try to extract country/location information. Isolate names are part of
+    # the header, so this scan already covers locations embedded in them.
+    for country in COUNTRY_KEYWORDS:
         if country in header_lower:
             record["Country"] = country.title()
             break
     
     # Extract date if present (look for year patterns)
-    import re
-    year_match = re.search(r'\b(19|20)\d{2}\b', header)
+    year_match = YEAR_PATTERN.search(header)
     if year_match:
         record["Create Date"] = year_match.group(0)
     
-    # Try to extract additional metadata from isolate/strain information
-    if 'isolate' in header_lower:
-        isolate_match = re.search(r'isolate\s+(\w+)', header, re.IGNORECASE)
-        if isolate_match and not record["Country"]:
-            # Sometimes isolate names contain location info
-            isolate_name = isolate_match.group(1).lower()
-            for country in countries:
-                if country in isolate_name:
-                    record["Country"] = country.title()
-                    break
-    
     return record
 
+def _qval(line: str) -> str:
+    """Return a FEATURES qualifier value with its surrounding quotes removed."""
+    _, _, value = line.partition("=")
+    value = value.strip()
+    # Strip at most one quote per side; multi-line values have only the opening one
+    if value[:1] == '"':
+        value = value[1:]
+    if value[-1:] == '"':
+        value = value[:-1]
+    return value
+
+def _set_qualifier_column(column: str, record: Dict[str, Any], value: str) -> None:
+    """Copy a FEATURES qualifier value verbatim into a record column."""
+    record[column] = value
+
+def _handle_geo_loc_name(record: Dict[str, Any], value: str) -> None:
+    """Store the geographic location and derive the country from it."""
+    record["Geographic Location"] = value
+    # Extract country from geographic location
+    if ":" in value:
+        record["Country"] = value.split(":")[0].strip()
+
+def _handle_db_xref(record: Dict[str, Any], value: str) -> None:
+    """Extract the taxon ID from a db_xref qualifier."""
+    if value.startswith("taxon:"):
+        record["Taxon ID"] = value.replace("taxon:", "").strip()
+
+# "Institution, City, Region Postcode, Country)" in a JOURNAL line
+INSTITUTION_PATTERN = re.compile(r'([^,]+),\s*([^,]+),\s*([^,]+)\s*\d+,\s*([^)]+)')
+
+# GenBank FEATURES qualifier name -> handler(record, value)
+FEATURE_QUALIFIER_HANDLERS = {
+    "isolate": functools.partial(_set_qualifier_column, "Isolate"),
+    "geo_loc_name": _handle_geo_loc_name,
+    "collection_date": functools.partial(_set_qualifier_column, "Collection Date"),
+    "gene": functools.partial(_set_qualifier_column, "Gene"),
+    "product": functools.partial(_set_qualifier_column, "Product"),
+    "protein_id": functools.partial(_set_qualifier_column, "Protein ID"),
+    "db_xref": _handle_db_xref,
+}
+
+# Blank GenBank record; keys are interned once and each LOCUS line clones it
+GENBANK_RECORD_TEMPLATE = {sys.intern(key): value for key, value in {
+    "Database": "NCBI",
+    "Id": "",
+    "Accession": "",
+    "Title": "",
+    "Organism": "",
+    "Length": 0,
+    "Marker": "",
+    "Quality Score": "",
+    "Country": "",
+    "Create Date": "",
+    "Collection Date": "",
+    "Geographic Location": "",
+    "Isolate": "",
+    "Sequencing Technology": "",
+    "Taxonomic Classification": "",
+    "Authors": "",
+    "Institution": "",
+    "Gene": "",
+    "Product": "",
+    "Protein ID": "",
+    "Taxon ID": ""
+}.items()}
+
+# Bump whenever _parse_genbank_records output changes so results persisted by
+# an older parser are not served from the on-disk cache
+GENBANK_PARSER_VERSION = 2
+
 def parse_genbank_text(text: str) -> List[Dict[str, Any]]:
     """Parse GenBank formatted text to extract comprehensive metadata."""
+    # Hand out fresh dicts so callers can't mutate the memoized records
+    return [dict(record) for record in _parse_genbank_cached(text)]
+
+@functools.lru_cache(maxsize=8)
+def _parse_genbank_cached(text: str) -> Tuple[Tuple[Tuple[str, Any], ...], ...]:
+    """Memoize GenBank parsing for repeated efetch payloads.
+
+    Parsing is deterministic on the input text. lru_cache keeps each key
+    alive, so every entry pins a whole efetch payload as well as its records;
+    the cache stays small and older payloads fall through to the on-disk
+    cache in _load_or_parse_genbank.
+    """
+    return tuple(tuple(record.items()) for record in _load_or_parse_genbank(text))
+
+def _load_or_parse_genbank(text: str) -> List[Dict[str, Any]]:
+    """Parse GenBank text, reusing results persisted across server runs.
+    
+    Large efetch payloads are keyed by their BLAKE2 digest under
+    Config.TEMP_DIR and expire after Config.CACHE_TTL seconds. Small ones
+    parse faster than a disk round-trip and are never persisted.
+    """
+    if len(text) < Config.PARSE_CACHE_MIN_BYTES:
+        return _parse_genbank_records(text)
+    
+    digest = hashlib.blake2b(text.encode(), digest_size=20).hexdigest()
+    cache_dir = os.path.join(Config.TEMP_DIR, f"parse-v{GENBANK_PARSER_VERSION}")
+    cache_path = os.path.join(cache_dir, f"{digest}.json")
+    
+    try:
+        if time.time() - os.path.getmtime(cache_path) < Config.CACHE_TTL:
+            with open(cache_path) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    
+    records = _parse_genbank_records(text)
+    
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            json.dump(records, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not persist GenBank parse cache: {e}")
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+    
+    return records
+
+def _parse_genbank_records(text: str) -> List[Dict[str, Any]]:
+    """Parse GenBank text into metadata records (uncached)."""
     records = []
     current_record = {}
     current_section = ""
     
-    lines = text.split("\n")
-    for i, line in enumerate(lines):
+    # Split into records at "//" and drop everything from ORIGIN on: no field
+    # we extract lives in the sequence block, which dominates the byte count.
+    # Pasted text may use CRLF endings, which would hide both markers.
+    lines = [
+        line
+        for record_text in text.replace("\r\n", "\n").split("\n//\n")
+        for line in record_text.split("\nORIGIN", 1)[0].split("\n")
+    ]
+    for line in lines:
         # Handle LOCUS line - start of new record
         if line.startswith("LOCUS"):
             if current_record:
                 records.append(current_record)
-            current_record = {
-                "Database": "NCBI",
-                "Id": "",
-                "Accession": "",
-                "Title": "",
-                "Organism": "",
-                "Length": 0,
-                "Marker": "",
-                "Quality Score": "",
-                "Country": "",
-                "Create Date": "",
-                "Collection Date": "",
-                "Geographic Location": "",
-                "Isolate": "",
-                "Sequencing Technology": "",
-                "Taxonomic Classification": "",
-                "Authors": "",
-                "Institution": "",
-                "Gene": "",
-                "Product": "",
-                "Protein ID": "",
-                "Taxon ID": ""
-            }
+            current_record = GENBANK_RECORD_TEMPLATE.copy()
             parts = line.split()
             if len(parts) > 1:
                 current_record["Id"] = parts[1]
@@ -981,8 +1092,7 @@ def parse_genbank_text(text: str) -> List[Dict[str, Any]]:
             # Extract institution and location from journal
             if ")" in journal:
                 # Look for institution pattern
-                import re
-                institution_match = re.search(r'([^,]+),\s*([^,]+),\s*([^,]+)\s*\d+,\s*([^)]+)', journal)
+                institution_match = INSTITUTION_PATTERN.search(journal)
                 if institution_match:
                     current_record["Institution"] = institution_match.group(1).strip()
                     location_parts = [institution_match.group(2), institution_match.group(3), institution_match.group(4)]
@@ -999,63 +1109,50 @@ def parse_genbank_text(text: str) -> List[Dict[str, Any]]:
         elif line.startswith("FEATURES"):
             current_section = "FEATURES"
         elif current_section == "FEATURES":
-            # Extract source features
-            if line.strip().startswith("/isolate="):
-                isolate = line.split('=')[1].strip().strip('"')
-                current_record["Isolate"] = isolate
-            elif line.strip().startswith("/geo_loc_name="):
-                geo_loc = line.split('=')[1].strip().strip('"')
-                current_record["Geographic Location"] = geo_loc
-                # Extract country from geographic location
-                if ":" in geo_loc:
-                    country = geo_loc.split(":")[0].strip()
-                    current_record["Country"] = country
-            elif line.strip().startswith("/collection_date="):
-                collection_date = line.split('=')[1].strip().strip('"')
-                current_record["Collection Date"] = collection_date
-            elif line.strip().startswith("/gene="):
-                gene = line.split('=')[1].strip().strip('"')
-                current_record["Gene"] = gene
-            elif line.strip().startswith("/product="):
-                product = line.split('=')[1].strip().strip('"')
-                current_record["Product"] = product
-            elif line.strip().startswith("/protein_id="):
-                protein_id = line.split('=')[1].strip().strip('"')
-                current_record["Protein ID"] = protein_id
-            elif line.strip().startswith("/db_xref="):
-                # Extract taxon ID from db_xref
-                xref = line.split('=')[1].strip().strip('"')
-                if xref.startswith("taxon:"):
-                    taxon_id = xref.replace("taxon:", "").strip()
-                    current_record["Taxon ID"] = taxon_id
+            # Extract source features: one strip and one find, then dispatch
+            # on the qualifier name
+            stripped = line.lstrip()
+            if stripped.startswith("/"):
+                eq = stripped.find("=")
+                if eq > 1:
+                    handler = FEATURE_QUALIFIER_HANDLERS.get(stripped[1:eq])
+                    if handler:
+                        handler(current_record, _qval(stripped))
                 
-        # Reset section on new major section
-        elif line.startswith(("KEYWORDS", "ORIGIN")):
+        # Reset section on new major section (KEYWORDS continuation lines
+        # would otherwise be appended to the DEFINITION title)
+        elif line.startswith("KEYWORDS"):
             current_section = ""
             
     # Extract marker information from title and gene for each record
     for record in records:
         if record.get("Title") or record.get("Gene"):
             title_lower = (record.get("Title", "") + " " + record.get("Gene", "")).lower()
-            if any(term in title_lower for term in ['coi', 'cytochrome oxidase', 'cox1', 'cytochrome c oxidase']):
-                record["Marker"] = "COI"
-            elif any(term in title_lower for term in ['16s', '16s ribosomal', '16s rrna']):
-                record["Marker"] = "16S"
-            elif any(term in title_lower for term in ['18s', '18s ribosomal', '18s rrna']):
-                record["Marker"] = "18S"
-            elif 'its' in title_lower:
-                record["Marker"] = "ITS"
-            elif 'rbcl' in title_lower:
-                record["Marker"] = "rbcL"
-            elif 'matk' in title_lower:
-                record["Marker"] = "matK"
+            marker = detect_marker(title_lower)
+            if marker:
+                record["Marker"] = marker
     
     if current_record:
         records.append(current_record)
     
     return records
 
-def extract_column_value(record: Dict[str, Any], column: str, original_data: str) -> Any:
+def infer_database(text: str) -> str:
+    """Infer the source database from raw sequence data."""
+    text_lower = text.lower()
+    if "ensembl" in text_lower:
+        return "Ensembl"
+    elif "ncbi" in text_lower:
+        return "NCBI"
+    elif "bold" in text_lower:
+        return "BOLD"
+    elif "silva" in text_lower:
+        return "SILVA"
+    elif "unite" in text_lower:
+        return "UNITE"
+    return ""
+
+def extract_column_value(record: Dict[str, Any], column: str, default_database: str = "") -> Any:
     """Extract a specific column value from a record."""
     
     # Direct mapping for common fields
@@ -1084,17 +1181,9 @@ def extract_column_value(record: Dict[str, Any], column: str, original_data: str
     
     # Special handling for specific columns
     if column == "Database":
-        # Try to infer database from data source
-        if "ensembl" in original_data.lower():
-            return "Ensembl"
-        elif "ncbi" in original_data.lower():
-            return "NCBI"
-        elif "bold" in original_data.lower():
-            return "BOLD"
-        elif "silva" in original_data.lower():
-            return "SILVA"
-        elif "unite" in original_data.lower():
-            return "UNITE"
+        # FASTA/GenBank records are tagged at parse time; JSON input falls back
+        # to the provenance inferred once by the caller
+        return default_database
     
     elif column == "Length" and "sequence" in record:
         return len(record["sequence"])
@@ -1112,12 +1201,33 @@ def extract_column_value(record: Dict[str, Any], column: str, original_data: str
     # Return empty string if not found
     return ""
 
+# Below this many rows the stdlib csv writer beats paying pyarrow's import cost
+ARROW_CSV_MIN_ROWS = 1000
+
+# Per-thread output buffers reused by the CSV/TSV formatters
+_format_buffers = threading.local()
+
+def reuse_format_buffer(name: str) -> io.StringIO:
+    """Return this thread's StringIO for a format, emptied for reuse."""
+    buffer = getattr(_format_buffers, name, None)
+    if buffer is None:
+        buffer = io.StringIO()
+        setattr(_format_buffers, name, buffer)
+    else:
+        buffer.seek(0)
+        buffer.truncate(0)
+    return buffer
+
 def format_as_csv(records: List[Dict[str, Any]], columns: List[str]) -> str:
     """Format records as CSV."""
+    if len(records) >= ARROW_CSV_MIN_ROWS:
+        arrow_output = format_with_arrow(records, columns, ",")
+        if arrow_output is not None:
+            return arrow_output
+    
     import csv
-    import io
     
-    output = io.StringIO()
+    output = reuse_format_buffer("csv")
     writer = csv.DictWriter(output, fieldnames=columns)
     writer.writeheader()
     writer.writerows(records)
@@ -1125,37 +1235,108 @@ def format_as_csv(records: List[Dict[str, Any]], columns: List[str]) -> str:
 
 def format_as_tsv(records: List[Dict[str, Any]], columns: List[str]) -> str:
     """Format records as TSV."""
+    if len(records) >= ARROW_CSV_MIN_ROWS:
+        arrow_output = format_with_arrow(records, columns, "\t")
+        if arrow_output is not None:
+            return arrow_output
+    
     import csv
-    import io
     
-    output = io.StringIO()
+    output = reuse_format_buffer("tsv")
     writer = csv.DictWriter(output, fieldnames=columns, delimiter='\t')
     writer.writeheader()
     writer.writerows(records)
     return output.getvalue()
 
+def format_with_arrow(records: List[Dict[str, Any]], columns: List[str], delimiter: str) -> Optional[str]:
+    """Write records with pyarrow's multi-threaded CSV writer.
+    
+    The output is byte-for-byte what csv.DictWriter produces, so results do
+    not change shape at ARROW_CSV_MIN_ROWS. Returns None when pyarrow is not
+    installed or when some field would need quoting, so callers can fall back
+    to the csv module.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return None
+    
+    # Arrow quotes every string it writes, while the csv module only quotes
+    # fields holding the delimiter, a quote or a line break (and the lone empty
+    # field of a one-column row). Only hand Arrow tables that need no quoting.
+    if len(columns) < 2:
+        return None
+    
+    unsafe = (delimiter, '"', "\r", "\n")
+    
+    def needs_quoting(values: List[str]) -> bool:
+        joined = "\x00".join(values)
+        return any(char in joined for char in unsafe)
+    
+    if needs_quoting(columns):
+        return None
+    
+    # Stringify like csv.DictWriter: missing keys and None become "". Each
+    # column is checked as soon as it is built, so a table that has to fall
+    # back stops at the first column needing quotes.
+    arrays = {}
+    for column in columns:
+        values = ["" if value is None else str(value) for value in (record.get(column) for record in records)]
+        if needs_quoting(values):
+            return None
+        arrays[column] = pa.array(values, type=pa.string())
+    
+    table = pa.table(arrays)
+    output = io.BytesIO()
+    pacsv.write_csv(table, output, write_options=pacsv.WriteOptions(
+        include_header=False,
+        delimiter=delimiter,
+        quoting_style="none"
+    ))
+    # Arrow always quotes header names and ends rows with "\n"; the csv module
+    # writes a bare header and "\r\n", and no cell here contains a line break
+    header = delimiter.join(columns) + "\r\n"
+    return header + output.getvalue().decode().replace("\n", "\r\n")
+
 def format_as_table(records: List[Dict[str, Any]], columns: List[str]) -> str:
     """Format records as a readable table."""
     if not records:
         return "No records found"
     
+    # Stringify every cell once; itemgetter pulls a whole row in one C call and
+    # the ChainMap supplies "" for columns a record doesn't have
+    defaults = dict.fromkeys(columns, "")
+    getter = itemgetter(*columns) if len(columns) > 1 else lambda r: tuple(r[c] for c in columns)
+    cells = [list(map(str, getter(ChainMap(record, defaults)))) for record in records]
+    
     # Calculate column widths
-    widths = {}
-    for col in columns:
-        widths[col] = max(len(col), max(len(str(record.get(col, ""))) for record in records))
+    widths = [max(len(col), max(len(row[i]) for row in cells)) for i, col in enumerate(columns)]
     
     # Create header
-    header = " | ".join(col.ljust(widths[col]) for col in columns)
+    header = " | ".join(col.ljust(width) for col, width in zip(columns, widths))
     separator = "-" * len(header)
     
     # Create rows
-    rows = []
-    for record in records:
-        row = " | ".join(str(record.get(col, "")).ljust(widths[col]) for col in columns)
-        rows.append(row)
+    rows = [" | ".join(cell.ljust(width) for cell, width in zip(row, widths)) for row in cells]
     
     return "\n".join([header, separator] + rows)
 
+# Tool name -> implementation, used by handle_call_tool for dispatch
+_TOOL_REGISTRY = {
+    "get_sequences": get_sequences,
+    "gget_ref": gget_ref,
+    "gget_search": gget_search,
+    "gget_info": gget_info,
+    "gget_seq": gget_seq,
+    "get_neighbors": get_neighbors,
+    "get_taxonomy": get_taxonomy,
+    "search_sra_studies": search_sra_studies,
+    "get_sra_runinfo": get_sra_runinfo,
+    "search_sra_cloud": search_sra_cloud,
+    "extract_sequence_columns": extract_sequence_columns,
+}
+
 async def main():
     """Main server entry point."""
     Config.validate()
@@ -3,29 +3,42 @@ Pytest configuration and shared fixtures for database MCP server tests.
 """
 
 import asyncio
-import json
+import io
+import orjson
 import os
+import sys
 import pytest
-from typing import Dict, Any, List
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Any, Iterator, List
 from unittest.mock import Mock, AsyncMock, patch
 import pandas as pd
+import requests
+import gget  # Imported up front so import cost stays out of test timings
 from Bio import Entrez
 
+try:
+    import uvloop
+except ImportError:  # Optional: faster event loop for the async tests, not available on Windows
+    uvloop = None
+
+# Make the server module importable from every test file
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
 # Set test environment variables
 os.environ["LOG_LEVEL"] = "ERROR"  # Reduce noise during testing
 os.environ["TEMP_DIR"] = "/tmp/test_mcp_cache"
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+# Imported after the path and environment setup so Config sees the test settings
+import database_mcp_server
 
-@pytest.fixture
-def sample_fasta_data():
-    """Sample FASTA format data for testing."""
-    return """>PV570336.1 Salmo salar mitochondrion, complete genome
+# Real API tests live in *_network.py modules; skip even collecting them
+# unless explicitly enabled
+collect_ignore_glob = [] if os.getenv("RUN_NETWORK_TESTS") else ["test_*_network.py"]
+
+# Read-only payloads shared by session-scoped fixtures, built once at import
+SAMPLE_FASTA = """>PV570336.1 Salmo salar mitochondrion, complete genome
 GTTAACGTAGCTTAAACAAAGCAAAGCACTGAAAATGCTTAGATGGATAATTGTATCCCATAAACACA
 AAGGTTTGGTCCTGGCCTTATAATTAATTGGAGGTAAGATTACACATGCAAACATCCATAAACCGGTGT
 >PV570337.1 Oncorhynchus mykiss cytochrome oxidase subunit 1 (COI) gene
@@ -35,10 +48,7 @@ GCTATAAACGAAAGTTTGACTAAGCCATACTAATTAGGGTTGGTAAATTTCGTGCCAGCCACCGCGGTC
 TTAAGTATAAACTTCACCCACCACCCCCTAAACCAAGACATTTTTAGATAATTAAGCCGTAGGCGACAA
 """
 
-@pytest.fixture
-def sample_genbank_data():
-    """Sample GenBank format data for testing."""
-    return """LOCUS       PV570336               16000 bp    DNA     circular VRT 26-SEP-2024
+SAMPLE_GENBANK = """LOCUS       PV570336               16000 bp    DNA     circular VRT 26-SEP-2024
 DEFINITION  Salmo salar mitochondrion, complete genome.
 ACCESSION   PV570336
 VERSION     PV570336.1
@@ -72,31 +82,63 @@ ORIGIN
 //
 """
 
-@pytest.fixture
+SAMPLE_JSON_SEQUENCES = orjson.dumps([
+    {
+        "Id": "PV570336.1",
+        "Accession": "PV570336.1",
+        "Title": "Salmo salar mitochondrion, complete genome",
+        "Organism": "Salmo salar",
+        "Length": 16000,
+        "Database": "NCBI",
+        "Marker": "mitogenome"
+    },
+    {
+        "Id": "AB012345.1",
+        "Accession": "AB012345.1",
+        "Title": "Oncorhynchus mykiss COI gene",
+        "Organism": "Oncorhynchus mykiss",
+        "Length": 658,
+        "Database": "NCBI",
+        "Marker": "COI"
+    }
+]).decode()
+
+MOCK_TAXONOMY_RECORD = [{
+    "TaxId": "8030",
+    "ScientificName": "Salmo salar",
+    "Lineage": "Eukaryota; Metazoa; Chordata; Craniata; Vertebrata; Euteleostomi; Actinopterygii; Salmoniformes; Salmonidae; Salmo",
+    "Rank": "species"
+}]
+
+def pytest_asyncio_loop_factories(config, item):
+    """Run async tests on uvloop when it is installed."""
+    if uvloop is not None:
+        return {"uvloop": uvloop.new_event_loop}
+    return {"asyncio": asyncio.new_event_loop}
+
+@pytest.fixture(scope="session", autouse=True)
+async def no_pending_tasks():
+    """Fail the session if a test leaves tasks pending on the shared loop."""
+    yield
+    pending = asyncio.all_tasks() - {asyncio.current_task()}
+    assert not pending, f"Tasks left pending on the shared event loop: {pending}"
+
+@pytest.fixture(scope="session")
+def sample_fasta_data():
+    """Sample FASTA format data for testing."""
+    return SAMPLE_FASTA
+
+@pytest.fixture(scope="session")
+def sample_genbank_data():
+    """Sample GenBank format data for testing."""
+    return SAMPLE_GENBANK
+
+@pytest.fixture(scope="session")
 def sample_json_sequence_data():
     """Sample JSON sequence data for testing."""
-    return json.dumps([
-        {
-            "Id": "PV570336.1",
-            "Accession": "PV570336.1",
-            "Title": "Salmo salar mitochondrion, complete genome",
-            "Organism": "Salmo salar",
-            "Length": 16000,
-            "Database": "NCBI",
-            "Marker": "mitogenome"
-        },
-        {
-            "Id": "AB012345.1",
-            "Accession": "AB012345.1",
-            "Title": "Oncorhynchus mykiss COI gene",
-            "Organism": "Oncorhynchus mykiss",
-            "Length": 658,
-            "Database": "NCBI",
-            "Marker": "COI"
-        }
-    ])
+    return SAMPLE_JSON_SEQUENCES
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_gget_search_result():
     """Mock result from gget.search()."""
     data = {
@@ -109,14 +151,14 @@ def mock_gget_search_result():
     }
     return pd.DataFrame.from_dict(data, orient='index')
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_gget_seq_result():
     """Mock result from gget.seq()."""
     return {
         "ENSG00000198804": "ATGTTCGCCGACCGTTGACTATTCTCAACAAACCACAAAGACATTGGAACACC"
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_entrez_search_result():
     """Mock result from Entrez.esearch()."""
     return {
@@ -125,7 +167,7 @@ def mock_entrez_search_result():
         "IdList": ["123456789", "987654321", "555555555"]
     }
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_entrez_fetch_result():
     """Mock FASTA result from Entrez.efetch()."""
     return """>gi|123456789|gb|PV570336.1| Salmo salar mitochondrion
@@ -134,7 +176,7 @@ GTTAACGTAGCTTAAACAAAGCAAAGCACTGAAAATGCTTAGATGGATAATTGTATCCCATAAACACA
 ATGACCAATATTCGAAAATCCCACCCGCTAGCAAACACCCCCACGGGACACAGCAGTGATAAAAATTAA
 """
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_sra_metadata():
     """Mock SRA metadata from pysradb."""
     data = {
@@ -149,7 +191,7 @@ def mock_sra_metadata():
     }
     return pd.DataFrame(data)
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_bold_response():
     """Mock response from BOLD API."""
     return """>BOLD:AAA1234|Salmo salar|COI-5P
@@ -158,99 +200,194 @@ AACTTTATACTTTATTTTTGGAGCTTGAGCAGGAATAGTAGGAACTTCTTTAAGAATTTTAATTCGAGCTGAATTAGGTC
 AACCTGTATTTAATTTTTGGGGCTTGAGCTGGTATAGTGGGAACTTCTTTAAGAATTTTAATTCGAGCTGAATTAGGTCAACCTGGATCATTAATTGGAGATGATCAAATTTATAATGTAATTGTTACAGCTCATGCTTTTATTATAATTTTTTTTATAGTTATACCTATTATAATTGGAGGATTTGGTAATTGACTTGTACCATTAATATTAGGAGCCCCTGATATAGCTTTTCCTCGAATAAATAATATAAGATTTTGA
 """
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_taxonomy_record():
     """Mock taxonomy record from NCBI."""
-    return [{
-        "TaxId": "8030",
-        "ScientificName": "Salmo salar",
-        "Lineage": "Eukaryota; Metazoa; Chordata; Craniata; Vertebrata; Euteleostomi; Actinopterygii; Salmoniformes; Salmonidae; Salmo",
-        "Rank": "species"
-    }]
+    return MOCK_TAXONOMY_RECORD
+
+# gget.* are synchronous calls, so they stay plain Mocks; their canned
+# results are built once at import rather than per patch
+GGET_REF_RESULT = pd.DataFrame({"ftp": ["ftp://example.com/file.fa.gz"]})
+GGET_INFO_RESULT = pd.DataFrame({"gene_name": ["MT-CO1"]})
+
+# Resets for the module-scoped patches active in the current test module
+_active_patch_resets = []
+
+@pytest.fixture(autouse=True)
+def _reset_shared_patches():
+    """Restore every active module-scoped patch to its defaults before each test.
+
+    The patches stay installed for the whole module, so this also covers tests
+    that never request mock_gget/mock_entrez/mock_requests/mock_pysradb and
+    would otherwise see whatever the previous test configured.
+    """
+    for reset in _active_patch_resets:
+        reset()
+
+@contextmanager
+def _registered_reset(reset):
+    """Apply a patch's defaults and keep them applied per test while active."""
+    reset()
+    _active_patch_resets.append(reset)
+    try:
+        yield
+    finally:
+        _active_patch_resets.remove(reset)
 
 # Mock patches for external dependencies
-@pytest.fixture
-def mock_gget(mock_gget_search_result, mock_gget_seq_result):
-    """Mock gget module functions."""
-    with patch('gget.search') as mock_search, \
-         patch('gget.seq') as mock_seq, \
-         patch('gget.ref') as mock_ref, \
-         patch('gget.info') as mock_info:
-
-        mock_search.return_value = mock_gget_search_result
-        mock_seq.return_value = mock_gget_seq_result
-        mock_ref.return_value = pd.DataFrame({"ftp": ["ftp://example.com/file.fa.gz"]})
-        mock_info.return_value = pd.DataFrame({"gene_name": ["MT-CO1"]})
-
-        yield {
+@pytest.fixture(scope="module")
+def _gget_patches(mock_gget_search_result, mock_gget_seq_result):
+    """Patch gget module functions once per test module."""
+    with patch.object(gget, 'search') as mock_search, \
+         patch.object(gget, 'seq') as mock_seq, \
+         patch.object(gget, 'ref') as mock_ref, \
+         patch.object(gget, 'info') as mock_info:
+
+        mocks = {
             'search': mock_search,
             'seq': mock_seq,
             'ref': mock_ref,
             'info': mock_info
         }
 
+        def reset():
+            for mock in mocks.values():
+                mock.reset_mock(return_value=True, side_effect=True)
+            mock_search.return_value = mock_gget_search_result
+            mock_seq.return_value = mock_gget_seq_result
+            mock_ref.return_value = GGET_REF_RESULT
+            mock_info.return_value = GGET_INFO_RESULT
+
+        with _registered_reset(reset):
+            yield mocks
+
 @pytest.fixture
-def mock_entrez(mock_entrez_search_result, mock_entrez_fetch_result):
-    """Mock BioPython Entrez functions."""
-    with patch('Bio.Entrez.esearch') as mock_search, \
-         patch('Bio.Entrez.efetch') as mock_fetch, \
-         patch('Bio.Entrez.read') as mock_read:
-
-        # Configure mock search
-        mock_search_handle = Mock()
-        mock_search.return_value = mock_search_handle
-        mock_read.return_value = mock_entrez_search_result
-
-        # Configure mock fetch
-        mock_fetch_handle = Mock()
-        mock_fetch_handle.read.return_value = mock_entrez_fetch_result
-        mock_fetch.return_value = mock_fetch_handle
-
-        yield {
+def mock_gget(_gget_patches):
+    """Mock gget module functions, reset to their defaults per test."""
+    return _gget_patches
+
+@pytest.fixture(scope="module")
+def _entrez_patches(mock_entrez_search_result, mock_entrez_fetch_result):
+    """Patch BioPython Entrez functions once per test module.
+
+    The mocks are specced against the real functions and the handles against
+    a text stream, so a misspelled attribute fails instead of auto-creating
+    a child mock.
+    """
+    with patch.object(Entrez, 'esearch', spec=True) as mock_search, \
+         patch.object(Entrez, 'efetch', spec=True) as mock_fetch, \
+         patch.object(Entrez, 'read', spec=True) as mock_read:
+
+        mocks = {
             'esearch': mock_search,
             'efetch': mock_fetch,
             'read': mock_read
         }
 
+        def reset():
+            for mock in mocks.values():
+                mock.reset_mock(return_value=True, side_effect=True)
+
+            # Configure mock search
+            mock_search.return_value = Mock(spec=io.StringIO)
+            mock_read.return_value = mock_entrez_search_result
+
+            # Configure mock fetch
+            mock_fetch_handle = Mock(spec=io.StringIO)
+            mock_fetch_handle.read.return_value = mock_entrez_fetch_result
+            mock_fetch.return_value = mock_fetch_handle
+
+        with _registered_reset(reset):
+            yield mocks
+
 @pytest.fixture
-def mock_requests(mock_bold_response):
-    """Mock requests library for HTTP calls."""
-    with patch('requests.get') as mock_get:
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.text = mock_bold_response
-        mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
+def mock_entrez(_entrez_patches):
+    """Mock BioPython Entrez functions, reset to the default search result per test.
 
-        yield mock_get
+    Tests override behaviour on the shared mocks directly, e.g.
+    ``mock_entrez['read'].return_value = record`` or
+    ``mock_entrez['esearch'].side_effect = Exception(...)``.
+    """
+    return _entrez_patches
+
+@pytest.fixture(scope="module")
+def _requests_patches(mock_bold_response):
+    """Patch requests.get once per test module."""
+    with patch.object(requests, 'get') as mock_get:
+
+        def reset():
+            mock_get.reset_mock(return_value=True, side_effect=True)
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.text = mock_bold_response
+            mock_response.raise_for_status = Mock()
+            mock_get.return_value = mock_response
+
+        with _registered_reset(reset):
+            yield mock_get
 
 @pytest.fixture
-def mock_pysradb(mock_sra_metadata):
-    """Mock pysradb library."""
-    with patch('pysradb.SRAweb') as mock_sraweb:
+def mock_requests(_requests_patches):
+    """Mock requests library for HTTP calls, reset to a 200 BOLD response per test."""
+    return _requests_patches
+
+@pytest.fixture(scope="module")
+def _pysradb_patches(mock_sra_metadata):
+    """Patch the server's SRAweb client once per test module."""
+    # The server binds SRAweb at import, so patch it there rather than on pysradb
+    with patch.object(database_mcp_server, 'SRAweb') as mock_sraweb:
         mock_db = Mock()
-        mock_db.sra_metadata.return_value = mock_sra_metadata
-        mock_db.search_sra.return_value = mock_sra_metadata
-        mock_sraweb.return_value = mock_db
 
-        yield mock_db
+        def reset():
+            mock_sraweb.reset_mock(return_value=True, side_effect=True)
+            mock_db.reset_mock(return_value=True, side_effect=True)
+            mock_db.sra_metadata.return_value = mock_sra_metadata
+            mock_db.search_sra.return_value = mock_sra_metadata
+            mock_sraweb.return_value = mock_db
+
+        with _registered_reset(reset):
+            yield mock_db
 
 @pytest.fixture
-def mock_bigquery():
-    """Mock Google BigQuery client."""
-    with patch('google.cloud.bigquery.Client') as mock_client:
-        mock_bq = Mock()
-        mock_job = Mock()
-        mock_results = Mock()
-        mock_results.to_dataframe.return_value = pd.DataFrame({
+def mock_pysradb(_pysradb_patches):
+    """Mock pysradb SRAweb client, reset to the sample metadata per test."""
+    return _pysradb_patches
+
+class BigQueryJobStub:
+    """Stand-in for a finished BigQuery query job."""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+
+    def result(self, max_results=None):
+        return self
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return self.frame
+
+class BigQueryClientStub:
+    """Stand-in for bigquery.Client that records the SQL it is asked to run."""
+
+    def __init__(self):
+        self.queries = []
+        self.frame = pd.DataFrame({
             "run_accession": ["SRR12345678"],
             "organism": ["Salmo salar"]
         })
-        mock_job.result.return_value = mock_results
-        mock_bq.query.return_value = mock_job
-        mock_client.return_value = mock_bq
 
-        yield mock_bq
+    def query(self, query_sql, job_config=None):
+        self.queries.append(query_sql)
+        return BigQueryJobStub(self.frame)
+
+@pytest.fixture
+def mock_bigquery(monkeypatch):
+    """Mock Google BigQuery client, usable without google-cloud-bigquery installed."""
+    client = BigQueryClientStub()
+    monkeypatch.setattr(database_mcp_server, 'bigquery', SimpleNamespace(
+        Client=lambda *args, **kwargs: client,
+        QueryJobConfig=lambda **kwargs: kwargs
+    ))
+    return client
 
 # Helper functions for tests
 def create_mock_mcp_request(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
@@ -265,6 +402,9 @@ def create_mock_mcp_request(tool_name: str, arguments: Dict[str, Any]) -> Dict[s
         }
     }
 
+# Translation table that deletes valid nucleotide characters; anything left over is invalid
+_DNA_DELETE = dict.fromkeys(map(ord, 'ACGTNacgtn'))
+
 def assert_valid_fasta(fasta_text: str) -> bool:
     """Validate FASTA format."""
     lines = fasta_text.strip().split('\n')
@@ -277,15 +417,35 @@ def assert_valid_fasta(fasta_text: str) -> bool:
             has_header = True
         elif has_header and line and not line.startswith('>'):
             # Check if sequence line contains valid characters
-            if not all(c in 'ACGTNacgtn' for c in line.strip()):
+            if line.strip().translate(_DNA_DELETE):
                 return False
 
     return has_header
 
+def iter_fasta_headers(fasta_text: str) -> Iterator[str]:
+    """Yield FASTA header lines (without '>'), skipping over sequence lines."""
+    pos = 0 if fasta_text.startswith('>') else fasta_text.find('\n>')
+    while pos != -1:
+        if fasta_text[pos] == '\n':
+            pos += 1
+        end = fasta_text.find('\n', pos)
+        if end == -1:
+            yield fasta_text[pos + 1:].rstrip()
+            return
+        yield fasta_text[pos + 1:end].rstrip()
+        pos = fasta_text.find('\n>', end)
+
+# Characters a JSON document can start with (besides leading whitespace)
+_JSON_START = frozenset('{["-0123456789tfn')
+
 def assert_valid_json(json_text: str) -> bool:
     """Validate JSON format."""
+    # Plain-text results like "Error in gget_search: ..." are rejected without a parse
+    first = json_text[:1]
+    if first not in _JSON_START and not first.isspace():
+        return False
     try:
-        json.loads(json_text)
+        orjson.loads(json_text)
         return True
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return False
@@ -3,14 +3,9 @@ Unit tests for gget-related MCP tools.
 """
 
 import pytest
-import json
-import pandas as pd
-from unittest.mock import patch, Mock, AsyncMock
-import sys
-import os
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import orjson
+from unittest.mock import patch, Mock, AsyncMock, call
+import gget
 
 from database_mcp_server import (
     gget_search, gget_ref, gget_info, gget_seq
@@ -19,6 +14,15 @@ from database_mcp_server import (
 pytestmark = pytest.mark.unit
 
 
+class EmptyFrame:
+    """Stand-in for an empty gget DataFrame, without pandas construction or to_json."""
+
+    empty = True
+
+    def to_json(self, **kwargs):
+        return "[]"
+
+
 class TestGgetSearch:
     """Tests for gget_search tool."""
 
@@ -32,16 +36,11 @@ class TestGgetSearch:
         )
 
         # Verify gget.search was called with correct arguments
-        mock_gget['search'].assert_called_once()
+        assert mock_gget['search'].call_count == 1
         call_args = mock_gget['search'].call_args
 
-        # Result should be JSON string
-        assert isinstance(result, str)
-        assert_valid_json(result)
-
-        # Parse and check content
-        data = json.loads(result)
-        assert isinstance(data, list)
+        # Result should be a JSON array; a single decode both validates and parses it
+        assert isinstance(orjson.loads(result), list)
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -55,7 +54,7 @@ class TestGgetSearch:
         )
 
         assert isinstance(result, str)
-        mock_gget['search'].assert_called_once()
+        assert mock_gget['search'].call_count == 1
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -71,30 +70,28 @@ class TestGgetSearch:
 
     @pytest.mark.asyncio
     @pytest.mark.gget
-    async def test_gget_search_error_handling(self):
+    async def test_gget_search_error_handling(self, monkeypatch):
         """Test gget_search error handling."""
-        with patch('gget.search', side_effect=Exception("API Error")):
-            result = await gget_search(
-                searchwords=["COI"],
-                species="invalid_species"
-            )
+        monkeypatch.setattr(gget, 'search', Mock(side_effect=Exception("API Error")))
+        result = await gget_search(
+            searchwords=["COI"],
+            species="invalid_species"
+        )
 
-            assert "Error in gget_search" in result
-            assert "API Error" in result
+        assert "Error in gget_search" in result
+        assert "API Error" in result
 
     @pytest.mark.asyncio
     @pytest.mark.gget
     async def test_gget_search_empty_result(self):
         """Test gget_search with empty result."""
-        with patch('gget.search', return_value=pd.DataFrame()):
+        with patch.object(gget, 'search', return_value=EmptyFrame()):
             result = await gget_search(
                 searchwords=["nonexistent_gene"],
                 species="homo_sapiens"
             )
 
-            assert isinstance(result, str)
-            data = json.loads(result)
-            assert data == []
+            assert orjson.loads(result) == []
 
 
 class TestGgetRef:
@@ -115,16 +112,21 @@ class TestGgetRef:
 
     @pytest.mark.asyncio
     @pytest.mark.gget
-    async def test_gget_ref_fasta_only(self, mock_gget):
-        """Test gget_ref requesting only FASTA."""
+    @pytest.mark.parametrize("species,which", [
+        ("salmo_salar", "fasta"),
+        ("mus_musculus", "gtf"),
+    ])
+    async def test_gget_ref_which(self, mock_gget, species, which):
+        """Test gget_ref requesting a single reference file type."""
         result = await gget_ref(
-            species="salmo_salar",
-            which="fasta"
+            species=species,
+            which=which
         )
 
-        mock_gget['ref'].assert_called_once()
-        call_args = mock_gget['ref'].call_args
-        assert call_args[1]['which'] == "fasta"
+        assert mock_gget['ref'].call_count == 1
+        assert mock_gget['ref'].call_args.kwargs == {
+            "species": species, "which": which, "release": None
+        }
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -135,30 +137,19 @@ class TestGgetRef:
             release=109
         )
 
-        call_args = mock_gget['ref'].call_args
-        assert call_args[1]['release'] == 109
-
-    @pytest.mark.asyncio
-    @pytest.mark.gget
-    async def test_gget_ref_gtf_only(self, mock_gget):
-        """Test gget_ref requesting only GTF."""
-        result = await gget_ref(
-            species="mus_musculus",
-            which="gtf"
-        )
-
-        call_args = mock_gget['ref'].call_args
-        assert call_args[1]['which'] == "gtf"
+        assert mock_gget['ref'].call_args.kwargs == {
+            "species": "homo_sapiens", "which": "all", "release": 109
+        }
 
     @pytest.mark.asyncio
     @pytest.mark.gget
-    async def test_gget_ref_error_handling(self):
+    async def test_gget_ref_error_handling(self, monkeypatch):
         """Test gget_ref error handling."""
-        with patch('gget.ref', side_effect=Exception("Species not found")):
-            result = await gget_ref(species="invalid_species")
+        monkeypatch.setattr(gget, 'ref', Mock(side_effect=Exception("Species not found")))
+        result = await gget_ref(species="invalid_species")
 
-            assert "Error in gget_ref" in result
-            assert "Species not found" in result
+        assert "Error in gget_ref" in result
+        assert "Species not found" in result
 
 
 class TestGgetInfo:
@@ -174,8 +165,7 @@ class TestGgetInfo:
             ["ENSG00000198804"],
             expand=False
         )
-        assert isinstance(result, str)
-        assert_valid_json(result)
+        orjson.loads(result)
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -184,8 +174,7 @@ class TestGgetInfo:
         ids = ["ENSG00000198804", "ENSG00000198712", "ENSG00000198899"]
         result = await gget_info(ens_ids=ids)
 
-        call_args = mock_gget['info'].call_args
-        assert call_args[0][0] == ids
+        assert mock_gget['info'].call_args == call(ids, expand=False)
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -196,18 +185,17 @@ class TestGgetInfo:
             expand=True
         )
 
-        call_args = mock_gget['info'].call_args
-        assert call_args[1]['expand'] is True
+        assert mock_gget['info'].call_args.kwargs == {"expand": True}
 
     @pytest.mark.asyncio
     @pytest.mark.gget
-    async def test_gget_info_error_handling(self):
+    async def test_gget_info_error_handling(self, monkeypatch):
         """Test gget_info error handling."""
-        with patch('gget.info', side_effect=Exception("Invalid ID")):
-            result = await gget_info(ens_ids=["INVALID_ID"])
+        monkeypatch.setattr(gget, 'info', Mock(side_effect=Exception("Invalid ID")))
+        result = await gget_info(ens_ids=["INVALID_ID"])
 
-            assert "Error in gget_info" in result
-            assert "Invalid ID" in result
+        assert "Error in gget_info" in result
+        assert "Invalid ID" in result
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -216,7 +204,7 @@ class TestGgetInfo:
         result = await gget_info(ens_ids=[])
 
         # Should still call the function
-        mock_gget['info'].assert_called_once()
+        assert mock_gget['info'].call_count == 1
 
 
 class TestGgetSeq:
@@ -237,39 +225,20 @@ class TestGgetSeq:
 
     @pytest.mark.asyncio
     @pytest.mark.gget
-    async def test_gget_seq_translate(self, mock_gget):
-        """Test gget_seq with translation."""
-        result = await gget_seq(
-            ens_ids=["ENSG00000198804"],
-            translate=True
-        )
-
-        call_args = mock_gget['seq'].call_args
-        assert call_args[1]['translate'] is True
-
-    @pytest.mark.asyncio
-    @pytest.mark.gget
-    async def test_gget_seq_genomic(self, mock_gget):
-        """Test gget_seq requesting genomic sequence."""
+    @pytest.mark.parametrize("option,value", [
+        ("translate", True),
+        ("seqtype", "genomic"),
+        ("seqtype", "protein"),
+    ])
+    async def test_gget_seq_options(self, mock_gget, option, value):
+        """Test gget_seq forwards translation and sequence type options."""
         result = await gget_seq(
             ens_ids=["ENSG00000198804"],
-            seqtype="genomic"
+            **{option: value}
         )
 
-        call_args = mock_gget['seq'].call_args
-        assert call_args[1]['seqtype'] == "genomic"
-
-    @pytest.mark.asyncio
-    @pytest.mark.gget
-    async def test_gget_seq_protein(self, mock_gget):
-        """Test gget_seq requesting protein sequence."""
-        result = await gget_seq(
-            ens_ids=["ENSG00000198804"],
-            seqtype="protein"
-        )
-
-        call_args = mock_gget['seq'].call_args
-        assert call_args[1]['seqtype'] == "protein"
+        expected = {"translate": False, "seqtype": "transcript", option: value}
+        assert mock_gget['seq'].call_args.kwargs == expected
 
     @pytest.mark.asyncio
     @pytest.mark.gget
@@ -278,24 +247,14 @@ class TestGgetSeq:
         ids = ["ENSG00000198804", "ENSG00000198712"]
         result = await gget_seq(ens_ids=ids)
 
-        call_args = mock_gget['seq'].call_args
-        assert call_args[0][0] == ids
+        assert mock_gget['seq'].call_args == call(ids, translate=False, seqtype="transcript")
 
     @pytest.mark.asyncio
     @pytest.mark.gget
-    async def test_gget_seq_error_handling(self):
+    async def test_gget_seq_error_handling(self, monkeypatch):
         """Test gget_seq error handling."""
-        with patch('gget.seq', side_effect=Exception("Sequence not found")):
-            result = await gget_seq(ens_ids=["INVALID_ID"])
-
-            assert "Error in gget_seq" in result
-            assert "Sequence not found" in result
-
+        monkeypatch.setattr(gget, 'seq', Mock(side_effect=Exception("Sequence not found")))
+        result = await gget_seq(ens_ids=["INVALID_ID"])
 
-def assert_valid_json(json_str: str) -> bool:
-    """Helper to validate JSON string."""
-    try:
-        json.loads(json_str)
-        return True
-    except json.JSONDecodeError:
-        return False
+        assert "Error in gget_seq" in result
+        assert "Sequence not found" in result
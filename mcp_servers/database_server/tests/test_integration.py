@@ -6,11 +6,7 @@ and may make real API calls (when API keys are available).
 """
 
 import pytest
-import json
-import os
-import sys
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import orjson
 
 from database_mcp_server import handle_call_tool
 
@@ -82,7 +78,7 @@ class TestMCPToolIntegration:
 
         assert len(result) > 0
         text = result[0].text
-        data = json.loads(text)
+        data = orjson.loads(text)
         assert isinstance(data, list)
         assert len(data) > 0
 
@@ -172,7 +168,7 @@ class TestSequenceRetrievalWorkflow:
         )
 
         assert len(extracted) > 0
-        data = json.loads(extracted[0].text)
+        data = orjson.loads(extracted[0].text)
         assert isinstance(data, list)
 
     @pytest.mark.asyncio
@@ -207,21 +203,22 @@ class TestErrorHandlingIntegration:
     """Integration tests for error handling across components."""
 
     @pytest.mark.asyncio
-    async def test_network_error_handling(self):
+    async def test_network_error_handling(self, monkeypatch):
         """Test handling of network errors."""
-        from unittest.mock import patch
+        import gget
+        from unittest.mock import Mock
 
-        with patch('gget.search', side_effect=Exception("Connection timeout")):
-            result = await handle_call_tool(
-                name="gget_search",
-                arguments={
-                    "searchwords": ["COI"],
-                    "species": "homo_sapiens"
-                }
-            )
+        monkeypatch.setattr(gget, 'search', Mock(side_effect=Exception("Connection timeout")))
+        result = await handle_call_tool(
+            name="gget_search",
+            arguments={
+                "searchwords": ["COI"],
+                "species": "homo_sapiens"
+            }
+        )
 
-            assert len(result) > 0
-            assert "Error" in result[0].text or "timeout" in result[0].text.lower()
+        assert len(result) > 0
+        assert "Error" in result[0].text or "timeout" in result[0].text.lower()
 
     @pytest.mark.asyncio
     async def test_invalid_data_error_handling(self):
@@ -240,65 +237,22 @@ class TestErrorHandlingIntegration:
         assert isinstance(result[0].text, str)
 
     @pytest.mark.asyncio
-    async def test_empty_result_handling(self):
+    async def test_empty_result_handling(self, monkeypatch):
         """Test handling of queries that return no results."""
-        from unittest.mock import patch
+        import gget
+        from unittest.mock import Mock
         import pandas as pd
 
-        with patch('gget.search', return_value=pd.DataFrame()):
-            result = await handle_call_tool(
-                name="get_sequences",
-                arguments={
-                    "taxon": "nonexistent_species",
-                    "region": "COI",
-                    "source": "gget"
-                }
-            )
-
-            assert len(result) > 0
-            assert isinstance(result[0].text, str)
-
-
-@pytest.mark.slow
-@pytest.mark.requires_network
-class TestRealAPIIntegration:
-    """
-    Integration tests that make real API calls.
-    Only run when explicitly requested with: pytest -m requires_network
-    """
-
-    @pytest.mark.skipif(
-        not os.getenv("RUN_NETWORK_TESTS"),
-        reason="Real API tests disabled. Set RUN_NETWORK_TESTS=1 to enable"
-    )
-    @pytest.mark.asyncio
-    async def test_real_gget_search(self):
-        """Test real gget API call (requires network)."""
+        monkeypatch.setattr(gget, 'search', Mock(return_value=pd.DataFrame()))
         result = await handle_call_tool(
-            name="gget_search",
+            name="get_sequences",
             arguments={
-                "searchwords": ["COI"],
-                "species": "homo_sapiens"
+                "taxon": "nonexistent_species",
+                "region": "COI",
+                "source": "gget"
             }
         )
 
         assert len(result) > 0
-        # Should get real results
-        data = json.loads(result[0].text)
-        assert len(data) > 0
-
-    @pytest.mark.skipif(
-        not os.getenv("RUN_NETWORK_TESTS"),
-        reason="Real API tests disabled"
-    )
-    @pytest.mark.asyncio
-    async def test_real_ncbi_taxonomy(self):
-        """Test real NCBI taxonomy call (requires network)."""
-        result = await handle_call_tool(
-            name="get_taxonomy",
-            arguments={"query": "Homo sapiens"}
-        )
+        assert isinstance(result[0].text, str)
 
-        assert len(result) > 0
-        data = json.loads(result[0].text)
-        assert len(data) > 0
@@ -0,0 +1,54 @@
+"""
+Integration tests that make real API calls.
+
+This module is only collected when RUN_NETWORK_TESTS is set (see conftest.py).
+"""
+
+import pytest
+import orjson
+import os
+
+from database_mcp_server import handle_call_tool
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.mark.slow
+@pytest.mark.requires_network
+@pytest.mark.skipif(
+    not os.getenv("RUN_NETWORK_TESTS"),
+    reason="Real API tests disabled. Set RUN_NETWORK_TESTS=1 to enable"
+)
+class TestRealAPIIntegration:
+    """
+    Integration tests that make real API calls.
+    Only run when explicitly requested with: RUN_NETWORK_TESTS=1 pytest -m requires_network
+    """
+
+    @pytest.mark.asyncio
+    async def test_real_gget_search(self):
+        """Test real gget API call (requires network)."""
+        result = await handle_call_tool(
+            name="gget_search",
+            arguments={
+                "searchwords": ["COI"],
+                "species": "homo_sapiens"
+            }
+        )
+
+        assert len(result) > 0
+        # Should get real results
+        data = orjson.loads(result[0].text)
+        assert len(data) > 0
+
+    @pytest.mark.asyncio
+    async def test_real_ncbi_taxonomy(self):
+        """Test real NCBI taxonomy call (requires network)."""
+        result = await handle_call_tool(
+            name="get_taxonomy",
+            arguments={"query": "Homo sapiens"}
+        )
+
+        assert len(result) > 0
+        data = orjson.loads(result[0].text)
+        assert len(data) > 0
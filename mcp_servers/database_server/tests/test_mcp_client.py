@@ -4,199 +4,184 @@ Test script for the database MCP server using a simple MCP client.
 """
 
 import asyncio
-import json
-import subprocess
+import os
+import shutil
 import sys
+from pathlib import Path
 from typing import Dict, Any, List
 
-async def test_mcp_server():
-    """Test the MCP server by communicating through stdio."""
-    
-    print("🧪 Testing ndiag-database-server MCP functionality")
-    print("=" * 50)
-    
-    try:
-        # Start the MCP server process
-        process = await asyncio.create_subprocess_exec(
-            "python", "database_mcp_server.py",
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd="/app"
-        )
-        
-        # Test 1: Initialize the server
-        print("\n🔍 Test 1: Initialize MCP server")
-        init_request = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {
-                    "name": "test-client",
-                    "version": "1.0.0"
-                }
-            }
-        }
-        
-        # Send initialization request
-        request_str = json.dumps(init_request) + "\n"
-        process.stdin.write(request_str.encode())
-        await process.stdin.drain()
-        
-        # Read response
-        response_line = await process.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.decode())
-            if response.get("result"):
-                print("✅ Server initialization successful")
-            else:
-                print(f"❌ Server initialization failed: {response}")
-        else:
-            print("❌ No response from server")
-        
-        # Test 2: List tools
-        print("\n🔍 Test 2: List available tools")
-        tools_request = {
-            "jsonrpc": "2.0",
-            "id": 2,
-            "method": "tools/list",
-            "params": {}
-        }
-        
-        request_str = json.dumps(tools_request) + "\n"
-        process.stdin.write(request_str.encode())
-        await process.stdin.drain()
-        
-        response_line = await process.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.decode())
-            if response.get("result") and response["result"].get("tools"):
-                tools = response["result"]["tools"]
-                print(f"✅ Found {len(tools)} tools:")
-                for tool in tools[:3]:  # Show first 3 tools
-                    print(f"  - {tool['name']}: {tool['description']}")
-                if len(tools) > 3:
-                    print(f"  ... and {len(tools) - 3} more tools")
-            else:
-                print(f"❌ Failed to list tools: {response}")
-        else:
-            print("❌ No response from server")
-        
-        # Test 3: Call a simple tool
-        print("\n🔍 Test 3: Call gget_search tool")
-        tool_request = {
-            "jsonrpc": "2.0",
-            "id": 3,
-            "method": "tools/call",
-            "params": {
-                "name": "gget_search",
-                "arguments": {
-                    "searchwords": ["COI"],
-                    "species": "homo_sapiens"
-                }
-            }
-        }
-        
-        request_str = json.dumps(tool_request) + "\n"
-        process.stdin.write(request_str.encode())
-        await process.stdin.drain()
-        
-        # Wait a bit for the tool to process
-        await asyncio.sleep(2)
-        
-        response_line = await process.stdout.readline()
-        if response_line:
-            response = json.loads(response_line.decode())
-            if response.get("result"):
-                print("✅ Tool call successful")
-                print(f"  Response length: {len(str(response['result']))} characters")
-            else:
-                print(f"❌ Tool call failed: {response}")
-        else:
-            print("❌ No response from tool call")
-        
-        # Cleanup
-        process.stdin.close()
-        await process.wait()
-        
-        print("\n" + "=" * 50)
-        print("🎉 MCP server testing completed!")
-        
-    except Exception as e:
-        print(f"❌ Error during testing: {str(e)}")
-        return False
-    
-    return True
+import orjson
+import pytest
 
-def test_container_mcp():
-    """Test the MCP server running in the container."""
-    print("🧪 Testing MCP server in container")
-    print("=" * 50)
-    
-    try:
-        # Test using docker exec to communicate with the MCP server
-        print("\n🔍 Testing container MCP server via docker exec")
-        
-        # Create a simple test script
-        test_script = '''
-import json
-import sys
-
-# Send initialize request
-init_request = {
+INIT_REQUEST = {
     "jsonrpc": "2.0",
     "id": 1,
     "method": "initialize",
     "params": {
         "protocolVersion": "2024-11-05",
         "capabilities": {},
-        "clientInfo": {"name": "test-client", "version": "1.0.0"}
+        "clientInfo": {
+            "name": "test-client",
+            "version": "1.0.0"
+        }
     }
 }
 
-print(json.dumps(init_request))
-sys.stdout.flush()
+INITIALIZED_NOTIFICATION = {
+    "jsonrpc": "2.0",
+    "method": "notifications/initialized"
+}
 
-# Send tools list request
-tools_request = {
+TOOLS_REQUEST = {
     "jsonrpc": "2.0",
     "id": 2,
     "method": "tools/list",
     "params": {}
 }
 
-print(json.dumps(tools_request))
-sys.stdout.flush()
-'''
-        
-        # Write test script to file
-        with open("/tmp/mcp_test.py", "w") as f:
-            f.write(test_script)
-        
-        # Execute the test
-        result = subprocess.run([
-            "docker", "exec", "-i", "ndiag-database-server",
-            "python", "-c", test_script
-        ], capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            print("✅ Container MCP server is accessible")
-            print("📄 Server response preview:")
-            print(result.stdout[:200] + "..." if len(result.stdout) > 200 else result.stdout)
-        else:
-            print(f"❌ Container test failed: {result.stderr}")
-            
-    except subprocess.TimeoutExpired:
-        print("⏰ Container test timed out (this might be normal for MCP stdio servers)")
-    except Exception as e:
-        print(f"❌ Container test error: {str(e)}")
+TOOL_REQUEST = {
+    "jsonrpc": "2.0",
+    "id": 3,
+    "method": "tools/call",
+    "params": {
+        "name": "gget_search",
+        "arguments": {
+            "searchwords": ["COI"],
+            "species": "homo_sapiens"
+        }
+    }
+}
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    """Encode a JSON-RPC message as a newline-delimited stdio frame."""
+    return orjson.dumps(message) + b"\n"
+
+# The probe messages never change, so encode them once at import
+INIT_FRAME = encode_frame(INIT_REQUEST)
+INITIALIZED_FRAME = encode_frame(INITIALIZED_NOTIFICATION)
+TOOLS_FRAME = encode_frame(TOOLS_REQUEST)
+TOOL_FRAME = encode_frame(TOOL_REQUEST)
+
+READ_CHUNK_SIZE = 65536
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+
+# Upper bound on a whole request/response exchange, and on a clean shutdown
+EXCHANGE_TIMEOUT = 60
+SHUTDOWN_TIMEOUT = 5
+
+async def exchange_frames(process, frames: List[bytes], expected: int) -> Dict[int, Dict[str, Any]]:
+    """Pipeline encoded frames to an MCP server process and collect `expected` responses by id."""
+    # Write every frame at once, then drain the responses. Output is read in
+    # chunks and split on newlines, carrying any partial frame over to the
+    # next read; this also avoids readline()'s 64 KiB line limit on large
+    # tool results. Responses are matched by id since they may arrive out of
+    # order, and an error response ends the exchange early.
+    process.stdin.write(b"".join(frames))
+    await process.stdin.drain()
+    
+    responses = {}
+    pending = b""
+    while len(responses) < expected:
+        chunk = await process.stdout.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            response = orjson.loads(line)
+            if "id" in response:
+                responses[response["id"]] = response
+                if "error" in response:
+                    return responses
+    return responses
+
+async def stop_process(process) -> None:
+    """Close stdin and wait briefly for a server to exit, killing it if it doesn't."""
+    if process.returncode is not None:
+        return
+    if not process.stdin.is_closing():
+        process.stdin.close()
+    try:
+        await asyncio.wait_for(process.wait(), timeout=SHUTDOWN_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+
+@pytest.mark.requires_network
+@pytest.mark.skipif(
+    not os.getenv("RUN_NETWORK_TESTS"),
+    reason="Makes a live gget_search call. Set RUN_NETWORK_TESTS=1 to enable"
+)
+async def test_mcp_server():
+    """Test the MCP server end to end over stdio, including a live tool call."""
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "database_mcp_server.py",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        cwd=SERVER_DIR
+    )
+    try:
+        responses = await asyncio.wait_for(
+            exchange_frames(
+                process, [INIT_FRAME, INITIALIZED_FRAME, TOOLS_FRAME, TOOL_FRAME], expected=3
+            ),
+            timeout=EXCHANGE_TIMEOUT
+        )
+    finally:
+        await stop_process(process)
+    
+    # Test 1: Initialize the server
+    assert responses.get(1, {}).get("result"), f"initialize failed: {responses.get(1)}"
+    
+    # Test 2: List tools
+    tools = responses.get(2, {}).get("result", {}).get("tools", [])
+    assert "gget_search" in {tool["name"] for tool in tools}, f"tools/list failed: {responses.get(2)}"
+    
+    # Test 3: Call a simple tool
+    assert "result" in responses.get(3, {}), f"gget_search call failed: {responses.get(3)}"
+
+CONTAINER_NAME = "ndiag-database-server"
+
+@pytest.mark.asyncio
+async def test_container_mcp():
+    """Test the MCP server running in the container."""
+    if shutil.which("docker") is None:
+        pytest.skip("docker is not installed")
+    
+    # Talk to the containerized server over a single docker exec pipe
+    process = await asyncio.create_subprocess_exec(
+        "docker", "exec", "-i", CONTAINER_NAME,
+        "python", "database_mcp_server.py",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    # Drain stderr alongside the exchange so a chatty server can't fill the pipe and stall
+    stderr_task = asyncio.create_task(process.stderr.read())
+    try:
+        responses = await asyncio.wait_for(
+            exchange_frames(process, [INIT_FRAME, INITIALIZED_FRAME, TOOLS_FRAME], expected=2),
+            timeout=EXCHANGE_TIMEOUT
+        )
+    finally:
+        # Never leave the docker exec child behind, whatever went wrong above
+        await stop_process(process)
+        stderr = (await stderr_task).decode(errors="replace")
+    
+    # docker exec fails straight away when the daemon or container isn't up
+    if not responses and process.returncode != 0:
+        pytest.skip(f"{CONTAINER_NAME} container is not available: {stderr.strip()[:200]}")
+    
+    assert responses.get(1, {}).get("result"), f"initialize failed: {responses.get(1)}"
+    tools = responses.get(2, {}).get("result", {}).get("tools", [])
+    assert tools, f"tools/list failed: {responses.get(2)}"
 
 if __name__ == "__main__":
     # Test the container version
-    test_container_mcp()
+    asyncio.run(test_container_mcp())
     
     print("\n" + "=" * 60)
     print("📋 MCP Server Test Summary")
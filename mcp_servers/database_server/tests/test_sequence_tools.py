@@ -2,13 +2,12 @@
 Unit tests for sequence retrieval and extraction tools.
 """
 
+import asyncio
 import pytest
-import json
-import sys
-import os
+import orjson
+import re
 from unittest.mock import patch, Mock
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import gget
 
 from database_mcp_server import (
     get_sequences,
@@ -17,11 +16,24 @@ from database_mcp_server import (
     extract_sequence_columns,
     parse_fasta_header,
     parse_genbank_text,
-    format_sequences
+    format_sequences,
+    format_as_csv,
+    format_with_arrow,
+    ARROW_CSV_MIN_ROWS
 )
+from conftest import iter_fasta_headers
 
 pytestmark = pytest.mark.unit
 
+_WORD = re.compile(r"\w+")
+
+REGIONS = ["COI", "16S", "ITS", "mitogenome", "whole"]
+
+
+def extract_tokens(term: str) -> set:
+    """Lowercased word tokens of an Entrez search term, for membership checks."""
+    return set(_WORD.findall(term.lower()))
+
 
 class TestGetSequences:
     """Tests for unified get_sequences tool."""
@@ -38,7 +50,7 @@ class TestGetSequences:
 
         assert isinstance(result, str)
         # gget.search should have been called
-        mock_gget['search'].assert_called()
+        assert mock_gget['search'].call_count
 
     @pytest.mark.asyncio
     async def test_get_sequences_ncbi_source(self, mock_entrez):
@@ -53,7 +65,7 @@ class TestGetSequences:
 
         assert isinstance(result, str)
         # Entrez should have been used
-        mock_entrez['esearch'].assert_called()
+        assert mock_entrez['esearch'].call_count
 
     @pytest.mark.asyncio
     async def test_get_sequences_bold_source(self, mock_requests):
@@ -67,7 +79,7 @@ class TestGetSequences:
 
         assert isinstance(result, str)
         # HTTP request should have been made
-        mock_requests.assert_called()
+        assert mock_requests.call_count
 
     @pytest.mark.asyncio
     async def test_get_sequences_max_results_limit(self, mock_gget):
@@ -86,18 +98,27 @@ class TestGetSequences:
         assert isinstance(result, str)
 
     @pytest.mark.asyncio
-    async def test_get_sequences_different_regions(self, mock_entrez):
+    @pytest.mark.parametrize("region", REGIONS)
+    async def test_get_sequences_different_regions(self, mock_entrez, region):
         """Test get_sequences with different genomic regions."""
-        regions = ["COI", "16S", "ITS", "mitogenome", "whole"]
+        result = await get_sequences(
+            taxon="Salmo salar",
+            region=region,
+            source="ncbi",
+            max_results=5
+        )
+        assert isinstance(result, str)
+
+    @pytest.mark.asyncio
+    async def test_get_sequences_regions_concurrently(self, mock_entrez):
+        """Test independent region lookups can run concurrently on one loop."""
+        results = await asyncio.gather(*(
+            get_sequences(taxon="Salmo salar", region=region, source="ncbi", max_results=5)
+            for region in REGIONS
+        ))
 
-        for region in regions:
-            result = await get_sequences(
-                taxon="Salmo salar",
-                region=region,
-                source="ncbi",
-                max_results=5
-            )
-            assert isinstance(result, str)
+        assert all(isinstance(result, str) for result in results)
+        assert mock_entrez['esearch'].call_count == len(REGIONS)
 
     @pytest.mark.asyncio
     async def test_get_sequences_genbank_format(self, mock_entrez):
@@ -112,16 +133,16 @@ class TestGetSequences:
         assert isinstance(result, str)
 
     @pytest.mark.asyncio
-    async def test_get_sequences_error_handling(self):
+    async def test_get_sequences_error_handling(self, mocker):
         """Test get_sequences error handling."""
-        with patch('gget.search', side_effect=Exception("API Error")):
-            result = await get_sequences(
-                taxon="invalid",
-                region="COI",
-                source="gget"
-            )
+        mocker.patch.object(gget, 'search', side_effect=Exception("API Error"))
+        result = await get_sequences(
+            taxon="invalid",
+            region="COI",
+            source="gget"
+        )
 
-            assert "Error retrieving sequences" in result
+        assert "Error retrieving sequences" in result
 
     @pytest.mark.asyncio
     async def test_get_sequences_unsupported_source(self):
@@ -150,8 +171,7 @@ class TestGetNCBISequences:
         )
 
         assert isinstance(result, str)
-        mock_entrez['esearch'].assert_called_once()
-        mock_entrez['efetch'].assert_called_once()
+        assert (mock_entrez['esearch'].call_count, mock_entrez['efetch'].call_count) == (1, 1)
 
     @pytest.mark.asyncio
     @pytest.mark.ncbi
@@ -165,9 +185,8 @@ class TestGetNCBISequences:
         )
 
         # Check that search was called with appropriate COI terms
-        call_args = mock_entrez['esearch'].call_args
-        search_term = call_args[1]['term']
-        assert "COI" in search_term or "cytochrome" in search_term
+        tokens = extract_tokens(mock_entrez['esearch'].call_args.kwargs['term'])
+        assert {"coi", "cytochrome"} & tokens
 
     @pytest.mark.asyncio
     @pytest.mark.ncbi
@@ -180,27 +199,23 @@ class TestGetNCBISequences:
             format="fasta"
         )
 
-        call_args = mock_entrez['esearch'].call_args
-        search_term = call_args[1]['term']
-        assert "16S" in search_term or "ribosomal" in search_term
+        tokens = extract_tokens(mock_entrez['esearch'].call_args.kwargs['term'])
+        assert {"16s", "ribosomal"} & tokens
 
     @pytest.mark.asyncio
     @pytest.mark.ncbi
-    async def test_ncbi_sequences_no_results(self):
+    async def test_ncbi_sequences_no_results(self, mock_entrez):
         """Test NCBI when no sequences found."""
-        mock_search_result = {"IdList": []}
-
-        with patch('Bio.Entrez.esearch') as mock_search, \
-             patch('Bio.Entrez.read', return_value=mock_search_result):
+        mock_entrez['read'].return_value = {"IdList": []}
 
-            result = await get_ncbi_sequences(
-                taxon="NonexistentSpecies",
-                region="COI",
-                max_results=10,
-                format="fasta"
-            )
+        result = await get_ncbi_sequences(
+            taxon="NonexistentSpecies",
+            region="COI",
+            max_results=10,
+            format="fasta"
+        )
 
-            assert "No sequences found" in result
+        assert "No sequences found" in result
 
     @pytest.mark.asyncio
     @pytest.mark.ncbi
@@ -233,7 +248,7 @@ class TestGetBOLDSequences:
         )
 
         assert isinstance(result, str)
-        mock_requests.assert_called_once()
+        assert mock_requests.call_count == 1
 
     @pytest.mark.asyncio
     @pytest.mark.bold
@@ -254,17 +269,17 @@ class TestGetBOLDSequences:
 
     @pytest.mark.asyncio
     @pytest.mark.bold
-    async def test_bold_error_handling(self):
+    async def test_bold_error_handling(self, mock_requests):
         """Test BOLD error handling."""
-        with patch('requests.get', side_effect=Exception("Connection error")):
-            result = await get_bold_sequences(
-                taxon="Salmo salar",
-                region="COI",
-                max_results=10,
-                format="fasta"
-            )
+        mock_requests.side_effect = Exception("Connection error")
+        result = await get_bold_sequences(
+            taxon="Salmo salar",
+            region="COI",
+            max_results=10,
+            format="fasta"
+        )
 
-            assert "Error retrieving BOLD sequences" in result
+        assert "Error retrieving BOLD sequences" in result
 
 
 class TestExtractSequenceColumns:
@@ -280,7 +295,7 @@ class TestExtractSequenceColumns:
         )
 
         assert isinstance(result, str)
-        data = json.loads(result)
+        data = orjson.loads(result)
         assert isinstance(data, list)
         assert len(data) > 0
 
@@ -299,7 +314,7 @@ class TestExtractSequenceColumns:
             output_format="json"
         )
 
-        data = json.loads(result)
+        data = orjson.loads(result)
         assert len(data) > 0
 
         record = data[0]
@@ -315,46 +330,29 @@ class TestExtractSequenceColumns:
             output_format="json"
         )
 
-        data = json.loads(result)
+        data = orjson.loads(result)
         assert len(data) == 2
         assert data[0]["Organism"] == "Salmo salar"
 
     @pytest.mark.asyncio
-    async def test_extract_csv_format(self, sample_fasta_data):
-        """Test CSV output format."""
+    @pytest.mark.parametrize("output_format,columns,header,header_rows", [
+        ("csv", ["Id", "Organism"], "Id,Organism", 1),
+        ("tsv", ["Id", "Accession"], "Id\tAccession", 1),
+        ("table", ["Id", "Organism"], "|", 2),  # Header plus separator line
+    ])
+    async def test_extract_output_formats(self, sample_fasta_data, output_format, columns, header, header_rows):
+        """Test CSV, TSV and table output formats."""
         result = await extract_sequence_columns(
             sequence_data=sample_fasta_data,
-            columns=["Id", "Organism"],
-            output_format="csv"
+            columns=columns,
+            output_format=output_format
         )
 
-        assert "Id,Organism" in result  # CSV header
         lines = result.strip().split('\n')
-        assert len(lines) > 1  # Header + data
-
-    @pytest.mark.asyncio
-    async def test_extract_tsv_format(self, sample_fasta_data):
-        """Test TSV output format."""
-        result = await extract_sequence_columns(
-            sequence_data=sample_fasta_data,
-            columns=["Id", "Accession"],
-            output_format="tsv"
-        )
-
-        assert "Id\tAccession" in result  # TSV header
-        assert '\t' in result
-
-    @pytest.mark.asyncio
-    async def test_extract_table_format(self, sample_fasta_data):
-        """Test table output format."""
-        result = await extract_sequence_columns(
-            sequence_data=sample_fasta_data,
-            columns=["Id", "Organism"],
-            output_format="table"
-        )
-
-        assert "|" in result  # Table formatting
-        assert "-" in result  # Separator line
+        assert header in lines[0]
+        assert len(lines) == header_rows + sum(1 for _ in iter_fasta_headers(sample_fasta_data))
+        if output_format == "table":
+            assert set(lines[1]) == {"-"}
 
     @pytest.mark.asyncio
     async def test_extract_marker_detection(self, sample_fasta_data):
@@ -365,7 +363,9 @@ class TestExtractSequenceColumns:
             output_format="json"
         )
 
-        data = json.loads(result)
+        data = orjson.loads(result)
+        # One record per FASTA header
+        assert len(data) == sum(1 for _ in iter_fasta_headers(sample_fasta_data))
         # Should detect COI from the FASTA headers
         markers = [r.get("Marker", "") for r in data]
         assert "COI" in markers or "mitogenome" in markers
@@ -382,6 +382,45 @@ class TestExtractSequenceColumns:
         # Should handle gracefully
         assert isinstance(result, str)
 
+    def test_format_as_csv_large_result_set(self):
+        """Test that large CSV output round-trips regardless of writer."""
+        import csv
+        import io
+
+        records = [
+            {"Id": f"SEQ{i}.1", "Title": f'COI gene, "partial" {i}', "Length": i}
+            for i in range(ARROW_CSV_MIN_ROWS + 1)
+        ]
+        result = format_as_csv(records, ["Id", "Title", "Length"])
+
+        rows = list(csv.DictReader(io.StringIO(result)))
+        assert len(rows) == len(records)
+        assert rows[-1] == {k: str(v) for k, v in records[-1].items()}
+
+    @pytest.mark.parametrize("delimiter", [",", "\t"])
+    def test_format_with_arrow_matches_csv_module(self, delimiter):
+        """Test that the pyarrow writer emits exactly what csv.DictWriter does."""
+        pytest.importorskip("pyarrow")
+        import csv
+        import io
+
+        columns = ["Id", "Country", "Length"]
+        records = [
+            {"Id": f"SEQ{i}.1", "Country": None if i % 3 else "Norway", "Length": i}
+            for i in range(ARROW_CSV_MIN_ROWS)
+        ]
+        expected = io.StringIO()
+        writer = csv.DictWriter(expected, fieldnames=columns, delimiter=delimiter)
+        writer.writeheader()
+        writer.writerows(records)
+
+        assert format_with_arrow(records, columns, delimiter) == expected.getvalue()
+
+    def test_format_with_arrow_defers_fields_needing_quotes(self):
+        """Test that fields the csv module would quote are left to it."""
+        records = [{"Id": "SEQ1.1", "Title": 'COI gene, "partial"'}]
+        assert format_with_arrow(records, ["Id", "Title"], ",") is None
+
 
 class TestParseFastaHeader:
     """Tests for FASTA header parsing."""
@@ -402,18 +441,16 @@ class TestParseFastaHeader:
         assert record["Accession"] == "AB012345.1"
         assert record["Organism"] == "Oncorhynchus mykiss"
 
-    def test_parse_header_marker_detection(self):
+    @pytest.mark.parametrize("header,expected_marker", [
+        ("COI gene sequence", "COI"),
+        ("16S ribosomal RNA", "16S"),
+        ("internal transcribed spacer ITS", "ITS"),
+        ("rbcL gene", "rbcL")
+    ])
+    def test_parse_header_marker_detection(self, header, expected_marker):
         """Test marker detection from header."""
-        headers = [
-            ("COI gene sequence", "COI"),
-            ("16S ribosomal RNA", "16S"),
-            ("internal transcribed spacer ITS", "ITS"),
-            ("rbcL gene", "rbcL")
-        ]
-
-        for header, expected_marker in headers:
-            record = parse_fasta_header(header)
-            assert record["Marker"] == expected_marker
+        record = parse_fasta_header(header)
+        assert record["Marker"] == expected_marker
 
     def test_parse_header_country_detection(self):
         """Test geographic location detection."""
@@ -422,6 +459,64 @@ class TestParseFastaHeader:
 
         assert "Norway" in record["Country"]
 
+    def test_parse_header_database_detection(self):
+        """Test provenance tagging from the header prefix."""
+        assert parse_fasta_header("BOLD:AAA1234|Salmo salar|COI-5P")["Database"] == "BOLD"
+        assert parse_fasta_header("gi|123456789|gb|PV570336.1| Salmo salar")["Database"] == "NCBI"
+        assert parse_fasta_header("ENSG00000198804")["Database"] == "Ensembl"
+
+
+class TestParseGenbankText:
+    """Tests for GenBank record parsing."""
+
+    def test_parse_genbank_returns_independent_records(self, sample_genbank_data):
+        """Test that memoized parses hand out fresh record dicts."""
+        first = parse_genbank_text(sample_genbank_data)
+        first[0]["Organism"] = "mutated"
+
+        second = parse_genbank_text(sample_genbank_data)
+        assert second[0]["Organism"] == "Salmo salar"
+        assert second[0]["Accession"] == "PV570336.1"
+
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"])
+    def test_parse_genbank_multiple_records(self, sample_genbank_data, newline):
+        """Test that every record survives, whatever the line endings."""
+        second_record = sample_genbank_data.replace("PV570336", "PV570337")
+        payload = (sample_genbank_data + "//\n" + second_record + "//\n").replace("\n", newline)
+
+        records = parse_genbank_text(payload)
+
+        assert [r["Accession"] for r in records] == ["PV570336.1", "PV570337.1"]
+        assert all(r["Organism"] == "Salmo salar" for r in records)
+
+    def test_parse_genbank_persists_large_payloads(self, sample_genbank_data, tmp_path):
+        """Test that large payloads are parsed once and reloaded from disk."""
+        import database_mcp_server
+
+        with patch.object(database_mcp_server.Config, 'TEMP_DIR', str(tmp_path)), \
+             patch.object(database_mcp_server.Config, 'PARSE_CACHE_MIN_BYTES', 0):
+            first = database_mcp_server._load_or_parse_genbank(sample_genbank_data)
+
+            with patch.object(database_mcp_server, '_parse_genbank_records') as mock_parse:
+                second = database_mcp_server._load_or_parse_genbank(sample_genbank_data)
+                mock_parse.assert_not_called()
+
+        assert second == first
+        cache_dir = tmp_path / f"parse-v{database_mcp_server.GENBANK_PARSER_VERSION}"
+        assert len(list(cache_dir.glob("*.json"))) == 1
+
+    def test_parse_genbank_cache_write_failure_cleans_up(self, sample_genbank_data, tmp_path):
+        """Test that a failed cache write leaves no temp file behind."""
+        import database_mcp_server
+
+        with patch.object(database_mcp_server.Config, 'TEMP_DIR', str(tmp_path)), \
+             patch.object(database_mcp_server.Config, 'PARSE_CACHE_MIN_BYTES', 0), \
+             patch.object(database_mcp_server.os, 'replace', side_effect=OSError("disk full")):
+            records = database_mcp_server._load_or_parse_genbank(sample_genbank_data)
+
+        assert records[0]["Accession"] == "PV570336.1"
+        assert not any(tmp_path.rglob("*.tmp"))
+
 
 class TestFormatSequences:
     """Tests for sequence formatting."""
@@ -3,13 +3,8 @@ Unit tests for taxonomy and SRA-related MCP tools.
 """
 
 import pytest
-import json
-import sys
-import os
+import orjson
 from unittest.mock import patch, Mock
-import pandas as pd
-
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from database_mcp_server import (
     get_neighbors,
@@ -26,127 +21,129 @@ class TestGetTaxonomy:
     """Tests for get_taxonomy tool."""
 
     @pytest.mark.asyncio
-    async def test_get_taxonomy_basic(self, mock_entrez, mock_taxonomy_record):
+    async def test_get_taxonomy_basic(self, mock_entrez, mock_entrez_search_result,
+                                      mock_taxonomy_record):
         """Test basic taxonomy retrieval."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_taxonomy(query="Salmo salar")
+        # First read() answers the esearch, second the efetch
+        mock_entrez['read'].side_effect = [mock_entrez_search_result, mock_taxonomy_record]
+        result = await get_taxonomy(query="Salmo salar")
 
-            assert isinstance(result, str)
-            data = json.loads(result)
-            assert isinstance(data, list)
+        assert orjson.loads(result) == mock_taxonomy_record
 
     @pytest.mark.asyncio
     async def test_get_taxonomy_by_accession(self, mock_entrez, mock_taxonomy_record):
         """Test taxonomy lookup by accession number."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_taxonomy(query="PV570336")
+        mock_entrez['read'].return_value = mock_taxonomy_record
+        result = await get_taxonomy(query="PV570336")
 
-            assert isinstance(result, str)
-            mock_entrez['esearch'].assert_called()
+        assert isinstance(result, str)
+        assert mock_entrez['esearch'].call_count
 
     @pytest.mark.asyncio
     async def test_get_taxonomy_no_results(self, mock_entrez):
         """Test taxonomy query with no results."""
         mock_search_result = {"IdList": []}
 
-        with patch('Bio.Entrez.read', return_value=mock_search_result):
-            result = await get_taxonomy(query="NonexistentTaxon")
+        mock_entrez['read'].return_value = mock_search_result
+        result = await get_taxonomy(query="NonexistentTaxon")
 
-            assert "No taxonomy found" in result
+        assert "No taxonomy found" in result
 
     @pytest.mark.asyncio
-    async def test_get_taxonomy_error_handling(self):
+    async def test_get_taxonomy_error_handling(self, mock_entrez):
         """Test taxonomy error handling."""
-        with patch('Bio.Entrez.esearch', side_effect=Exception("API Error")):
-            result = await get_taxonomy(query="Salmo salar")
+        mock_entrez['esearch'].side_effect = Exception("API Error")
+        result = await get_taxonomy(query="Salmo salar")
 
-            assert "Error in get_taxonomy" in result
+        assert "Error in get_taxonomy" in result
 
     @pytest.mark.asyncio
     async def test_get_taxonomy_common_name(self, mock_entrez, mock_taxonomy_record):
         """Test taxonomy lookup with common name."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_taxonomy(query="Atlantic salmon")
+        mock_entrez['read'].return_value = mock_taxonomy_record
+        result = await get_taxonomy(query="Atlantic salmon")
 
-            assert isinstance(result, str)
+        assert isinstance(result, str)
 
 
 class TestGetNeighbors:
     """Tests for get_neighbors tool."""
 
     @pytest.mark.asyncio
-    async def test_get_neighbors_basic(self, mock_entrez, mock_taxonomy_record):
+    async def test_get_neighbors_basic(self, mock_entrez, mock_entrez_search_result,
+                                       mock_taxonomy_record):
         """Test basic taxonomic neighbor finding."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_neighbors(
-                taxon="Salmo salar",
-                rank="species"
-            )
+        # First read() answers the esearch, second the efetch
+        mock_entrez['read'].side_effect = [mock_entrez_search_result, mock_taxonomy_record]
+        result = await get_neighbors(
+            taxon="Salmo salar",
+            rank="species"
+        )
 
-            assert isinstance(result, str)
-            data = json.loads(result)
-            assert "taxon" in data
-            assert "neighbors" in data
+        assert isinstance(result, str)
+        data = orjson.loads(result)
+        assert "taxon" in data
+        assert "neighbors" in data
 
     @pytest.mark.asyncio
     async def test_get_neighbors_genus_level(self, mock_entrez, mock_taxonomy_record):
         """Test neighbor finding at genus level."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_neighbors(
-                taxon="Salmo",
-                rank="genus",
-                distance=1
-            )
+        mock_entrez['read'].return_value = mock_taxonomy_record
+        result = await get_neighbors(
+            taxon="Salmo",
+            rank="genus",
+            distance=1
+        )
 
-            assert isinstance(result, str)
+        assert isinstance(result, str)
 
     @pytest.mark.asyncio
     async def test_get_neighbors_family_level(self, mock_entrez, mock_taxonomy_record):
         """Test neighbor finding at family level."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_neighbors(
-                taxon="Salmonidae",
-                rank="family",
-                distance=2
-            )
+        mock_entrez['read'].return_value = mock_taxonomy_record
+        result = await get_neighbors(
+            taxon="Salmonidae",
+            rank="family",
+            distance=2
+        )
 
-            assert isinstance(result, str)
+        assert isinstance(result, str)
 
     @pytest.mark.asyncio
     async def test_get_neighbors_common_misids(self, mock_entrez, mock_taxonomy_record):
         """Test neighbor finding with common misidentifications flag."""
-        with patch('Bio.Entrez.read', return_value=mock_taxonomy_record):
-            result = await get_neighbors(
-                taxon="Salmo salar",
-                rank="species",
-                common_misIDs=True
-            )
+        mock_entrez['read'].return_value = mock_taxonomy_record
+        result = await get_neighbors(
+            taxon="Salmo salar",
+            rank="species",
+            common_misIDs=True
+        )
 
-            assert isinstance(result, str)
+        assert isinstance(result, str)
 
     @pytest.mark.asyncio
     async def test_get_neighbors_no_results(self, mock_entrez):
         """Test neighbor finding with no results."""
         mock_search_result = {"IdList": []}
 
-        with patch('Bio.Entrez.read', return_value=mock_search_result):
-            result = await get_neighbors(
-                taxon="NonexistentTaxon",
-                rank="species"
-            )
+        mock_entrez['read'].return_value = mock_search_result
+        result = await get_neighbors(
+            taxon="NonexistentTaxon",
+            rank="species"
+        )
 
-            assert "No taxonomy found" in result
+        assert "No taxonomy found" in result
 
     @pytest.mark.asyncio
-    async def test_get_neighbors_error_handling(self):
+    async def test_get_neighbors_error_handling(self, mock_entrez):
         """Test neighbor finding error handling."""
-        with patch('Bio.Entrez.esearch', side_effect=Exception("Connection error")):
-            result = await get_neighbors(
-                taxon="Salmo salar",
-                rank="species"
-            )
+        mock_entrez['esearch'].side_effect = Exception("Connection error")
+        result = await get_neighbors(
+            taxon="Salmo salar",
+            rank="species"
+        )
 
-            assert "Error in get_neighbors" in result
+        assert "Error in get_neighbors" in result
 
 
 class TestSearchSRAStudies:
@@ -154,60 +151,28 @@ class TestSearchSRAStudies:
 
     @pytest.mark.asyncio
     @pytest.mark.sra
-    async def test_search_sra_entrez_basic(self, mock_entrez):
-        """Test basic SRA search using Entrez."""
+    @pytest.mark.parametrize("query,filters,term_filter,retmax", [
+        ("Salmo salar COI", None, None, 100),
+        ("mitochondrial genome", {"organism": "Salmo salar"}, '"Salmo salar"[Organism]', 100),
+        ("salmon", {"library_strategy": "AMPLICON"}, '"AMPLICON"[Strategy]', 100),
+        ("Salmo salar", {"max_results": 50}, None, 50),
+    ])
+    async def test_search_sra_entrez(self, mock_entrez, query, filters, term_filter, retmax):
+        """Test SRA search using Entrez, with filters folded into the search term."""
         result = await search_sra_studies(
-            query="Salmo salar COI",
+            query=query,
+            filters=filters,
             search_method="entrez"
         )
 
-        assert isinstance(result, str)
-        data = json.loads(result)
+        data = orjson.loads(result)
         assert "IdList" in data or "Count" in data
 
-    @pytest.mark.asyncio
-    @pytest.mark.sra
-    async def test_search_sra_with_organism_filter(self, mock_entrez):
-        """Test SRA search with organism filter."""
-        result = await search_sra_studies(
-            query="mitochondrial genome",
-            filters={"organism": "Salmo salar"},
-            search_method="entrez"
-        )
-
-        assert isinstance(result, str)
-        # Check that organism filter was included in search
-        call_args = mock_entrez['esearch'].call_args
-        search_term = call_args[1]['term']
-        assert "Salmo salar" in search_term or "Organism" in search_term
-
-    @pytest.mark.asyncio
-    @pytest.mark.sra
-    async def test_search_sra_with_library_strategy(self, mock_entrez):
-        """Test SRA search with library strategy filter."""
-        result = await search_sra_studies(
-            query="salmon",
-            filters={"library_strategy": "AMPLICON"},
-            search_method="entrez"
-        )
-
-        assert isinstance(result, str)
-        call_args = mock_entrez['esearch'].call_args
-        search_term = call_args[1]['term']
-        assert "AMPLICON" in search_term or "Strategy" in search_term
-
-    @pytest.mark.asyncio
-    @pytest.mark.sra
-    async def test_search_sra_max_results(self, mock_entrez):
-        """Test SRA search with max_results limit."""
-        result = await search_sra_studies(
-            query="Salmo salar",
-            filters={"max_results": 50},
-            search_method="entrez"
-        )
-
-        call_args = mock_entrez['esearch'].call_args
-        assert call_args[1]['retmax'] == 50
+        call_kwargs = mock_entrez['esearch'].call_args.kwargs
+        assert call_kwargs['term'].startswith(query)
+        if term_filter:
+            assert term_filter in call_kwargs['term']
+        assert call_kwargs['retmax'] == retmax
 
     @pytest.mark.asyncio
     @pytest.mark.sra
@@ -222,15 +187,15 @@ class TestSearchSRAStudies:
 
     @pytest.mark.asyncio
     @pytest.mark.sra
-    async def test_search_sra_error_handling(self):
+    async def test_search_sra_error_handling(self, mock_entrez):
         """Test SRA search error handling."""
-        with patch('Bio.Entrez.esearch', side_effect=Exception("Network error")):
-            result = await search_sra_studies(
-                query="Salmo salar",
-                search_method="entrez"
-            )
+        mock_entrez['esearch'].side_effect = Exception("Network error")
+        result = await search_sra_studies(
+            query="Salmo salar",
+            search_method="entrez"
+        )
 
-            assert "Error in search_sra_studies" in result
+        assert "Error in search_sra_studies" in result
 
 
 class TestGetSRARunInfo:
@@ -246,7 +211,7 @@ class TestGetSRARunInfo:
         )
 
         assert isinstance(result, str)
-        data = json.loads(result)
+        data = orjson.loads(result)
         assert isinstance(data, list)
 
     @pytest.mark.asyncio
@@ -301,15 +266,15 @@ class TestGetSRARunInfo:
 
     @pytest.mark.asyncio
     @pytest.mark.sra
-    async def test_get_sra_runinfo_error_handling(self):
+    async def test_get_sra_runinfo_error_handling(self, mock_pysradb):
         """Test SRA run info error handling."""
-        with patch('pysradb.SRAweb', side_effect=Exception("Database error")):
-            result = await get_sra_runinfo(
-                study_accession="INVALID",
-                format="json"
-            )
+        mock_pysradb.sra_metadata.side_effect = Exception("Database error")
+        result = await get_sra_runinfo(
+            study_accession="INVALID",
+            format="json"
+        )
 
-            assert "Error in get_sra_runinfo" in result
+        assert "Error in get_sra_runinfo" in result
 
 
 class TestSearchSRACloud:
@@ -327,8 +292,9 @@ class TestSearchSRACloud:
                 max_rows=10
             )
 
-            # Should attempt to use BigQuery
+            # Should run the query through BigQuery
             assert isinstance(result, str)
+            assert mock_bigquery.queries == ["SELECT * FROM `nih-sra-datastore.sra.metadata` LIMIT 10"]
 
     @pytest.mark.asyncio
     @pytest.mark.sra
@@ -370,14 +336,14 @@ class TestSearchSRACloud:
 
     @pytest.mark.asyncio
     @pytest.mark.sra
-    async def test_search_sra_cloud_error_handling(self):
+    async def test_search_sra_cloud_error_handling(self, mocker, mock_bigquery):
         """Test SRA cloud search error handling."""
-        with patch('database_mcp_server.Config.GOOGLE_APPLICATION_CREDENTIALS', '/fake/path'), \
-             patch('google.cloud.bigquery.Client', side_effect=Exception("Query error")):
+        mocker.patch('database_mcp_server.Config.GOOGLE_APPLICATION_CREDENTIALS', '/fake/path')
+        mocker.patch.object(mock_bigquery, 'query', side_effect=Exception("Query error"))
 
-            result = await search_sra_cloud(
-                query_sql="INVALID SQL",
-                platform="bigquery"
-            )
+        result = await search_sra_cloud(
+            query_sql="INVALID SQL",
+            platform="bigquery"
+        )
 
-            assert "Error in search_sra_cloud" in result
+        assert "Error in search_sra_cloud" in result
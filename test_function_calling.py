@@ -16,69 +16,108 @@ import json
 import sys
 import os
 from pathlib import Path
+from typing import NamedTuple
+
+# orjson parses whole byte buffers much faster than json; json.loads accepts bytes too
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+BASE_DIR = Path(__file__).parent
+APP_DIR = BASE_DIR / "autogen_app"
 
 # Load environment variables from .env file
 try:
     from dotenv import load_dotenv
     # Try to load from autogen_app/.env first, then from root .env
-    env_paths = [
-        Path(__file__).parent / "autogen_app" / ".env",
-        Path(__file__).parent / ".env"
-    ]
-    for env_path in env_paths:
-        if env_path.exists():
-            load_dotenv(env_path)
-            print(f"✓ Loaded environment from {env_path}")
-            break
+    env_path = next(
+        (p for p in (APP_DIR / ".env", BASE_DIR / ".env") if p.exists()),
+        None
+    )
+    if env_path is not None:
+        load_dotenv(env_path)
+        print(f"✓ Loaded environment from {env_path}")
 except ImportError:
     print("⚠️  python-dotenv not installed, trying to use existing environment variables")
 
-# Add autogen_app to path
-sys.path.insert(0, str(Path(__file__).parent / "autogen_app"))
-
-from qpcr_assistant import QPCRAssistant
 import logging
 
 # Setup logging to see what's happening
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Shared defaults for missing tool call fields; never mutated
+_EMPTY_DICT: dict = {}
+_EMPTY_STR = ""
+
+
+class ToolCall(NamedTuple):
+    """The fields of a task log tool call line that this test reports."""
+    tool: str = "unknown"
+    arguments: dict = _EMPTY_DICT
+    result_preview: str = _EMPTY_STR
+
+    @classmethod
+    def decode(cls, line: bytes) -> "ToolCall":
+        tc = json_loads(line)
+        return cls(
+            tc.get("tool", "unknown"),
+            tc.get("arguments", _EMPTY_DICT),
+            tc.get("result_preview", _EMPTY_STR)
+        )
+
 
 def test_function_calling():
     """Test that function calling actually works."""
     
-    print("=" * 80)
-    print("FUNCTION CALLING TEST")
-    print("=" * 80)
-    print()
+    # Status lines are collected and written once per phase; errors and
+    # warnings flush what is pending and print immediately
+    out = []
+    emit = out.append
+    
+    def flush():
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+            sys.stdout.flush()
+            out.clear()
+    
+    emit("=" * 80)
+    emit("FUNCTION CALLING TEST")
+    emit("=" * 80)
+    emit("")
+    flush()
     
     # 1. Load configuration
-    config_path = Path(__file__).parent / "autogen_app" / "OAI_CONFIG_LIST.json"
+    config_path = APP_DIR / "OAI_CONFIG_LIST.json"
     
     if not config_path.exists():
+        flush()
         print(f"❌ Config file not found: {config_path}")
         print("Please ensure OAI_CONFIG_LIST.json exists with valid API keys")
         return False
     
-    with open(config_path) as f:
-        config_list = json.load(f)
+    config_list = json_loads(config_path.read_bytes())
     
     # CRITICAL FIX: Resolve "env:VAR_NAME" references manually
     # AutoGen's env resolution doesn't always work properly with load_dotenv
+    env = os.environ
     for config in config_list:
-        if "api_key" in config and isinstance(config["api_key"], str):
-            if config["api_key"].startswith("env:"):
-                env_var_name = config["api_key"][4:]  # Remove "env:" prefix
-                env_value = os.getenv(env_var_name)
-                if env_value:
-                    config["api_key"] = env_value
-                    print(f"✓ Resolved {env_var_name} for model {config.get('model')}")
-                else:
-                    print(f"⚠️  Warning: {env_var_name} not found in environment")
-    
-    print(f"✓ Loaded config from {config_path}")
-    print(f"  Available models: {[c['model'] for c in config_list]}")
-    print()
+        api_key = config.get("api_key")
+        if type(api_key) is not str or api_key[:4] != "env:":
+            continue
+        env_var_name = api_key[4:]  # Remove "env:" prefix
+        env_value = env.get(env_var_name)
+        if env_value:
+            config["api_key"] = env_value
+            logger.info("Resolved %s for model %s", env_var_name, config.get("model"))
+        else:
+            logger.warning("%s not found in environment", env_var_name)
+    
+    emit(f"✓ Loaded config from {config_path}")
+    emit(f"  Available models: {[c['model'] for c in config_list]}")
+    emit("")
+    flush()
     
     # 2. Check if OPENAI_API_KEY is set
     openai_key = os.getenv("OPENAI_API_KEY")
@@ -88,19 +127,27 @@ def test_function_calling():
         print("   Set it with: export OPENAI_API_KEY='your-key-here'")
         return False
     
-    # Debug: Show first 10 chars of API key to verify it's loaded
-    print(f"✓ OPENAI_API_KEY is set: {openai_key[:10]}...")
+    # Cheap shape check so a malformed key fails here rather than after
+    # building the assistant and connecting to the MCP server
+    if not openai_key.startswith("sk-") or len(openai_key) < 40:
+        print(f"❌ OPENAI_API_KEY does not look like an OpenAI key: {openai_key[:6]}...")
+        print("   Expected an 'sk-' prefixed key of at least 40 characters")
+        return False
     
-    # CRITICAL: AutoGen expects environment variables to be set in os.environ
-    # Even if loaded from .env, make sure they're in the environment
-    if not os.environ.get("OPENAI_API_KEY"):
-        print("⚠️  Setting OPENAI_API_KEY in os.environ for AutoGen")
-        os.environ["OPENAI_API_KEY"] = openai_key
+    # Debug: Show first 10 chars of API key to verify it's loaded
+    emit(f"✓ OPENAI_API_KEY is set: {openai_key[:10]}...")
     
-    print()
+    emit("")
     
     # 3. Create assistant with gpt-4o (should be default)
-    print("Creating QPCRAssistant...")
+    emit("Creating QPCRAssistant...")
+    flush()
+    # Imported here so the autogen/MCP stack is only loaded once the config
+    # and API key checks have passed. qpcr_assistant imports its siblings by
+    # top-level name, so autogen_app has to be on the path.
+    if str(APP_DIR) not in sys.path:
+        sys.path.insert(0, str(APP_DIR))
+    from qpcr_assistant import QPCRAssistant
     test_results_dir = "/tmp/test_function_calling"
     os.makedirs(test_results_dir, exist_ok=True)
     
@@ -110,88 +157,103 @@ def test_function_calling():
             log_dir=test_results_dir,
             model_name="gpt-4o"  # Explicitly use gpt-4o
         )
-        print(f"✓ Created assistant with model: {assistant.model_name}")
-        print()
+        emit(f"✓ Created assistant with model: {assistant.model_name}")
+        emit("")
     except ValueError as e:
         print(f"❌ Failed to create assistant: {e}")
         return False
     
     # 4. Initialize (connects to MCP server)
-    print("Initializing MCP connection...")
+    emit("Initializing MCP connection...")
+    flush()
     try:
         assistant.initialize()
-        print("✓ MCP connection established")
-        print()
+        emit("✓ MCP connection established")
+        emit("")
     except Exception as e:
         print(f"❌ Failed to initialize: {e}")
         return False
     
     # 5. Run a simple test query
-    print("Running test query: 'Get taxonomy information for Salmo salar'")
-    print("-" * 80)
+    emit("Running test query: 'Get taxonomy information for Salmo salar'")
+    emit("-" * 80)
+    flush()
     
     try:
         result = assistant.run_workflow(
             "Get taxonomy information for Salmo salar using get_taxonomy tool"
         )
-        print()
-        print("-" * 80)
-        print("✓ Workflow completed")
-        print()
+        emit("")
+        emit("-" * 80)
+        emit("✓ Workflow completed")
+        emit("")
     except Exception as e:
-        print(f"❌ Workflow failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Workflow failed: %s", e)
         return False
     
     # 6. Check the results
-    print("Checking results...")
+    emit("Checking results...")
     
-    # Find the most recent task log
-    log_files = sorted(Path(test_results_dir).glob("task_*.json"))
-    if not log_files:
+    # Find the most recent task log in one scandir pass, keeping only the newest entry
+    latest_path = None
+    latest_mtime = -1.0
+    with os.scandir(test_results_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith("task_") and name.endswith(".json")):
+                continue
+            mtime = entry.stat().st_mtime
+            if mtime > latest_mtime:
+                latest_mtime, latest_path = mtime, entry.path
+    if latest_path is None:
+        flush()
         print("❌ No log files found")
         return False
     
-    latest_log = log_files[-1]
-    print(f"  Log file: {latest_log.name}")
+    latest_log = Path(latest_path)
+    emit(f"  Log file: {latest_log.name}")
     
-    with open(latest_log) as f:
-        log_data = json.load(f)
+    # Tool calls are streamed next to the task log, one JSON object per line;
+    # the file only exists once at least one call has been logged
+    tool_calls_log = latest_log.with_name(f"{latest_log.stem}_tool_calls.jsonl")
+    tool_call_lines = (
+        tool_calls_log.read_bytes().splitlines() if tool_calls_log.exists() else []
+    )
     
     # Check for tool calls
-    tool_calls = log_data.get("tool_calls", [])
-    num_tool_calls = len(tool_calls)
+    num_tool_calls = len(tool_call_lines)
     
-    print(f"  Tool calls: {num_tool_calls}")
+    emit(f"  Tool calls: {num_tool_calls}")
     
     if num_tool_calls == 0:
+        flush()
         print("❌ FAILED: No tool calls were made!")
         print("   The LLM is still just writing text instead of calling functions")
         return False
     
-    print("✓ Tool calls were made!")
-    print()
+    emit("✓ Tool calls were made!")
+    emit("")
     
     # Show the tool calls
-    print("Tool calls made:")
-    for i, tc in enumerate(tool_calls, 1):
-        print(f"  {i}. {tc.get('tool_name', 'unknown')}")
-        print(f"     Arguments: {tc.get('arguments', {})}")
-        result_preview = str(tc.get('result', ''))[:100]
-        print(f"     Result: {result_preview}...")
-        print()
+    emit("Tool calls made:")
+    for i, line in enumerate(tool_call_lines, 1):
+        tc = ToolCall.decode(line)
+        emit(f"  {i}. {tc.tool}")
+        emit(f"     Arguments: {tc.arguments}")
+        emit(f"     Result: {tc.result_preview[:100]}...")
+        emit("")
     
     # 7. Final verdict
-    print("=" * 80)
-    print("✅ FUNCTION CALLING TEST PASSED!")
-    print("=" * 80)
-    print()
-    print("The fix is working correctly:")
-    print("  ✓ Using gpt-4o model")
-    print("  ✓ Functions are being called via API (not text)")
-    print(f"  ✓ {num_tool_calls} tool call(s) executed successfully")
-    print()
+    emit("=" * 80)
+    emit("✅ FUNCTION CALLING TEST PASSED!")
+    emit("=" * 80)
+    emit("")
+    emit("The fix is working correctly:")
+    emit("  ✓ Using gpt-4o model")
+    emit("  ✓ Functions are being called via API (not text)")
+    emit(f"  ✓ {num_tool_calls} tool call(s) executed successfully")
+    emit("")
+    flush()
     
     return True
 